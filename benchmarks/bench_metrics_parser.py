@@ -0,0 +1,147 @@
+"""Compare the single-pass CADAssembly_metrics.xml parser with the original XPath-per-field parser.
+
+Usage: python benchmarks/bench_metrics_parser.py [copies] [repeat]
+
+The example metrics file in tests/ is replicated ``copies`` times (default 200) into a temporary
+directory so the comparison runs on an assembly of a realistic size.
+"""
+import os
+import sys
+import copy
+import shutil
+import tempfile
+import timeit
+
+import numpy as np
+
+from cyphy2cad_postprocess.reader import CyPhy2CADReader, CyPhy2CADData, et
+
+
+TESTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "tests")
+
+
+def legacy_parse_cadassembly_metrics_xml(path):
+    # The original implementation of CyPhy2CADReader._parse_cadassembly_metrics_xml, kept for comparison.
+    root_elem = et.parse(os.path.join(path, "CADAssembly_metrics.xml")).getroot()
+    components = {}
+
+    def extract_matrix(element, dim=None):
+        if not dim:
+            dim = [3,3]
+        matrix = [[0 for col in range(dim[1])] for row in range(dim[0])]
+        for row_index, row in enumerate(element.findall("./Rows/Row")):
+            for col_index, col in enumerate(row.findall('Column')):
+                matrix[row_index][col_index] = float(col.get('Value'))
+        return matrix
+
+    def extract_xyz_vector(element):
+        return [float(element.get("X")), float(element.get("Y")), float(element.get("Z"))]
+
+    def get_scalar(metric_component, name):
+        scalar = metric_component.find("./Scalars/Scalar[@Name='{}']".format(name))
+        if scalar is not None:
+            return float(scalar.get('Value'))
+        return None
+
+    comp_to_metric = {}
+    comp_to_pose = {}
+    metric_to_data = {}
+    for cad_comp in root_elem.iter('CADComponent'):
+        comp_to_metric[cad_comp.get('ComponentInstanceID')] = cad_comp.get('MetricID')
+    for child in root_elem.findall("./MetricComponents/MetricComponent[@MetricID='1']/Children/ChildMetric"):
+        comp_to_pose[child.get('ComponentInstanceID')] = (
+            np.array(extract_matrix(child.find('RotationMatrix'))),
+            np.array(extract_xyz_vector(child.find('Translation'))))
+    for met_comp in root_elem.iter('MetricComponent'):
+        bbox = met_comp.find('BoundingBox')
+        data = {
+            'bounding_box': np.array(extract_xyz_vector(bbox)),
+            'outline_points': np.array([extract_xyz_vector(pt) for pt in bbox.findall('./OutlinePoints/Point')])
+        }
+        cog = met_comp.find('CG')
+        if cog is not None:
+            data['center_of_gravity'] = np.array(extract_xyz_vector(cog))
+        for at in ('DEFAULT_CSYS', 'CENTER_OF_GRAVITY'):
+            inertia = met_comp.find("./InertiaTensor[@At='{}']".format(at))
+            if inertia is not None:
+                data[at] = extract_matrix(inertia)
+        p_moments_inertia = met_comp.find('PrincipleMomentsOfInertia')
+        if p_moments_inertia is not None:
+            data['principle'] = (extract_matrix(p_moments_inertia.find('RotationMatrix')),
+                                 extract_matrix(p_moments_inertia, dim=[3,1]))
+        for name in ('SurfaceArea', 'Volume', 'Mass'):
+            data[name] = get_scalar(met_comp, name)
+        data['units'] = dict(met_comp.find('Units').attrib)
+        metric_to_data[met_comp.get('MetricID')] = data
+    for comp, met in comp_to_metric.items():
+        components[comp] = (metric_to_data[met], comp_to_pose.get(comp))
+    return components
+
+
+def make_scaled_metrics(out_dir, copies):
+    """Write a CADAssembly_metrics.xml holding ``copies`` replicas of every example MetricComponent."""
+    tree = et.parse(os.path.join(TESTS_DIR, "CADAssembly_metrics.xml"))
+    root_elem = tree.getroot()
+    top_comp = root_elem.find("./Assemblies/Assembly/CADComponent")
+    met_comps = root_elem.find("MetricComponents")
+    top_children = met_comps.find("./MetricComponent[@MetricID='1']/Children")
+    originals = [m for m in met_comps if m.get('MetricID') != '1']
+    child_metrics = list(top_children)
+    cad_comps = list(top_comp)
+    next_metric = max(int(m.get('MetricID')) for m in met_comps) + 1
+    for index in range(1, copies):
+        remap = {}
+        for met_comp in originals:
+            new_comp = copy.deepcopy(met_comp)
+            remap[met_comp.get('MetricID')] = str(next_metric)
+            new_comp.set('MetricID', str(next_metric))
+            met_comps.append(new_comp)
+            next_metric += 1
+        for cad_comp in cad_comps:
+            new_comp = copy.deepcopy(cad_comp)
+            new_comp.set('ComponentInstanceID', "{}-{}".format(cad_comp.get('ComponentInstanceID'), index))
+            new_comp.set('MetricID', remap[cad_comp.get('MetricID')])
+            top_comp.append(new_comp)
+        for child_metric in child_metrics:
+            new_child = copy.deepcopy(child_metric)
+            new_child.set('ComponentInstanceID', "{}-{}".format(child_metric.get('ComponentInstanceID'), index))
+            new_child.set('MetricID', remap[child_metric.get('MetricID')])
+            top_children.append(new_child)
+    tree.write(os.path.join(out_dir, "CADAssembly_metrics.xml"))
+    return len(list(top_comp.iter('CADComponent')))
+
+
+def main(argv):
+    copies = int(argv[1]) if len(argv) > 1 else 200
+    repeat = int(argv[2]) if len(argv) > 2 else 3
+
+    out_dir = tempfile.mkdtemp()
+    try:
+        n_components = make_scaled_metrics(out_dir, copies)
+        reader = CyPhy2CADReader(out_dir)
+
+        def single_pass():
+            reader._cad_data = CyPhy2CADData()
+            reader._parse_cadassembly_metrics_xml(out_dir)
+
+        def legacy():
+            legacy_parse_cadassembly_metrics_xml(out_dir)
+
+        def xml_only():
+            et.parse(os.path.join(out_dir, "CADAssembly_metrics.xml"))
+
+        xml_time = min(timeit.repeat(xml_only, number=1, repeat=repeat))
+        legacy_time = min(timeit.repeat(legacy, number=1, repeat=repeat))
+        single_pass_time = min(timeit.repeat(single_pass, number=1, repeat=repeat))
+        print("components:  {}".format(n_components))
+        print("xml parse:   {:.3f} s".format(xml_time))
+        print("legacy:      {:.3f} s (mining {:.3f} s)".format(legacy_time, legacy_time - xml_time))
+        print("single-pass: {:.3f} s (mining {:.3f} s)".format(single_pass_time, single_pass_time - xml_time))
+        print("speedup:     {:.2f}x overall, {:.2f}x mining".format(
+            legacy_time / single_pass_time, (legacy_time - xml_time) / max(single_pass_time - xml_time, 1e-9)))
+    finally:
+        shutil.rmtree(out_dir)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,128 @@
+"""Wall time and peak memory of parse, dump and write on synthetic assemblies of growing size.
+
+Usage: python benchmarks/bench_scaling.py [--sizes 100,1000,10000,100000] [--depth 1] [--part-types 100]
+                                          [--repeat 3] [--output bench_results.json] [--baseline FILE]
+
+For every size a SyntheticAssembly is written to a temporary directory. Each operation is measured in a
+fresh interpreter so its peak resident memory (``ru_maxrss``) is not inflated by earlier runs: ``parse``
+is ``CyPhy2CADReader.parse``, ``dump`` and ``write`` run on the parsed data, so their peak includes the
+parse. The results are written as JSON; with ``--baseline`` each time and peak is also printed as a ratio
+to the matching entry of an earlier results file.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import resource
+import tempfile
+import subprocess
+
+import numpy as np
+
+from cyphy2cad_postprocess.reader import CyPhy2CADReader
+from cyphy2cad_postprocess.synthetic import write_synthetic_assembly
+
+
+OPERATIONS = ('parse', 'dump', 'write')
+
+
+def measure(operation, cyphy2cad_output_dir, repeat):
+    """Best wall time of ``operation`` over ``repeat`` runs and the peak RSS of this process, in MB."""
+    times = []
+    for _ in range(repeat):
+        reader = CyPhy2CADReader(cyphy2cad_output_dir)
+        start = time.time()
+        cad_data = reader.parse()
+        if operation == 'parse':
+            times.append(time.time() - start)
+            continue
+        start = time.time()
+        if operation == 'dump':
+            cad_data.dump()
+        else:
+            cad_data.write(os.path.join(cyphy2cad_output_dir, 'cad_data.json'))
+        times.append(time.time() - start)
+        del cad_data
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / 2.0 ** 20 if sys.platform == 'darwin' else peak / 2.0 ** 10
+    return {'seconds': min(times), 'peak_rss_mb': peak_mb}
+
+
+def run_measurement(operation, cyphy2cad_output_dir, repeat):
+    # a fresh interpreter per operation, so every peak starts from the same baseline
+    process = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--measure', operation,
+                                cyphy2cad_output_dir, '--repeat', str(repeat)],
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    out, err = process.communicate()
+    if process.returncode != 0:
+        return {'seconds': None, 'peak_rss_mb': None, 'error': err.strip().splitlines()[-1:] or
+                ['exit code {}'.format(process.returncode)]}
+    return json.loads(out)
+
+
+def baseline_entries(filename):
+    with open(filename) as f_in:
+        results = json.load(f_in)['results']
+    return {(entry['operation'], entry['components'], entry['depth']): entry for entry in results}
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='100,1000,10000,100000')
+    parser.add_argument('--depth', type=int, default=1)
+    parser.add_argument('--part-types', type=int, default=100,
+                        help="distinct part definitions (0: every part its own)")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--baseline', help="earlier results file to compare with")
+    parser.add_argument('--measure', nargs=2, metavar=('OPERATION', 'DIR'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv[1:])
+
+    if args.measure:
+        operation, cyphy2cad_output_dir = args.measure
+        print(json.dumps(measure(operation, cyphy2cad_output_dir, args.repeat)))
+        return
+
+    baseline = baseline_entries(args.baseline) if args.baseline else {}
+    results = []
+    for size in [int(size) for size in args.sizes.split(',')]:
+        out_dir = tempfile.mkdtemp()
+        try:
+            write_synthetic_assembly(out_dir, size, args.depth, args.part_types or None)
+            file_mb = sum(os.path.getsize(os.path.join(out_dir, name)) for name in os.listdir(out_dir)) / 2.0 ** 20
+            for operation in OPERATIONS:
+                entry = {'operation': operation, 'components': size, 'depth': args.depth,
+                         'part_types': args.part_types, 'input_mb': file_mb}
+                entry.update(run_measurement(operation, out_dir, args.repeat))
+                results.append(entry)
+
+                line = '{:<6} {:>7} components: '.format(operation, size)
+                if entry['seconds'] is None:
+                    print(line + 'failed ({})'.format(' '.join(entry['error'])))
+                    continue
+                line += '{:8.3f} s {:9.1f} MB'.format(entry['seconds'], entry['peak_rss_mb'])
+                previous = baseline.get((operation, size, args.depth))
+                if previous and previous.get('seconds'):
+                    line += '   {:5.2f}x time {:5.2f}x peak vs baseline'.format(
+                        entry['seconds'] / previous['seconds'], entry['peak_rss_mb'] / previous['peak_rss_mb'])
+                print(line)
+        finally:
+            shutil.rmtree(out_dir)
+
+    with open(args.output, 'w') as f_out:
+        json.dump({
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'results': results
+        }, f_out, indent=4, sort_keys=True)
+    print("results written to {}".format(args.output))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
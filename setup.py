@@ -4,5 +4,8 @@ setup(
     version="0.1.1",
     package_dir={"": "src"},
     packages=["cyphy2cad_postprocess"],
-    install_requires=["numpy"]
+    install_requires=["numpy"],
+    entry_points={
+        "console_scripts": ["cyphy2cad-batch=cyphy2cad_postprocess.batch:main"]
+    }
 )
\ No newline at end of file
@@ -0,0 +1,112 @@
+import os
+import sys
+import argparse
+import traceback
+import multiprocessing
+
+from functools import partial
+
+from reader import CyPhy2CADReader, CYPHY2CAD_OUTPUT_FILES
+from json_utils import json_dump_reformatted, json_dumps_reformatted
+
+
+def find_output_dirs(root):
+    """Return every directory under ``root`` (including ``root``) that holds a CyPhy2CAD output."""
+    output_dirs = []
+    for dir_path, dir_names, file_names in os.walk(root):
+        dir_names.sort()
+        if all(name in file_names for name in CYPHY2CAD_OUTPUT_FILES):
+            output_dirs.append(dir_path)
+    return output_dirs
+
+
+def _parse_output_dir(cyphy2cad_output_dir, cache=None):
+    # runs in a pool worker: a broken design is reported instead of raised
+    try:
+        cad_data = CyPhy2CADReader(cyphy2cad_output_dir, cache=cache).parse()
+        return cyphy2cad_output_dir, cad_data, None
+    except Exception:
+        return cyphy2cad_output_dir, None, traceback.format_exc()
+
+
+def parse_many(cyphy2cad_output_dirs, processes=None, chunksize=None, cache=None):
+    """Parse many CyPhy2CAD output directories on a process pool.
+
+    ``cyphy2cad_output_dirs`` is either a root path, which is searched with ``find_output_dirs``, or a
+    list of output directories. Returns ``(results, errors)``: ``results`` maps each directory to its
+    CyPhy2CADData and ``errors`` maps each directory that failed to parse to the formatted traceback.
+    An optional ParseCache is shared by all workers.
+    """
+    parse_output_dir = partial(_parse_output_dir, cache=cache)
+    if isinstance(cyphy2cad_output_dirs, basestring):
+        cyphy2cad_output_dirs = find_output_dirs(cyphy2cad_output_dirs)
+    cyphy2cad_output_dirs = list(cyphy2cad_output_dirs)
+
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    processes = max(1, min(processes, len(cyphy2cad_output_dirs)))
+    if chunksize is None:
+        # a few chunks per worker keeps the workers busy without paying IPC per directory
+        chunksize = max(1, len(cyphy2cad_output_dirs) // (processes * 4))
+
+    results = {}
+    errors = {}
+    if processes == 1:
+        parsed = (parse_output_dir(path) for path in cyphy2cad_output_dirs)
+        for path, cad_data, error in parsed:
+            _record(results, errors, path, cad_data, error)
+        return results, errors
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        for path, cad_data, error in pool.imap_unordered(parse_output_dir, cyphy2cad_output_dirs, chunksize):
+            _record(results, errors, path, cad_data, error)
+    finally:
+        pool.close()
+        pool.join()
+    return results, errors
+
+
+def _record(results, errors, path, cad_data, error):
+    if error is None:
+        results[path] = cad_data
+    else:
+        errors[path] = error
+
+
+def dump_many(results):
+    """Dump the merged ``parse_many`` results, keyed by output directory, as a JSON string."""
+    return json_dumps_reformatted({path: cad_data.data for path, cad_data in results.items()})
+
+
+def write_many(results, filename):
+    with open(filename, 'w') as f_out:
+        json_dump_reformatted({path: cad_data.data for path, cad_data in results.items()}, f_out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Post-process many CyPhy2CAD output directories.")
+    parser.add_argument('paths', nargs='+',
+                        help="CyPhy2CAD output directories, or root directories to search for them")
+    parser.add_argument('-o', '--output', default="cyphy2cad_results.json",
+                        help="merged JSON results file (default: %(default)s)")
+    parser.add_argument('-j', '--processes', type=int, default=None,
+                        help="number of worker processes (default: number of CPUs)")
+    args = parser.parse_args(argv)
+
+    cyphy2cad_output_dirs = []
+    for path in args.paths:
+        cyphy2cad_output_dirs.extend(find_output_dirs(path))
+
+    results, errors = parse_many(cyphy2cad_output_dirs, processes=args.processes)
+    write_many(results, args.output)
+
+    for path in sorted(errors):
+        sys.stderr.write("Failed to parse {}:\n{}\n".format(path, errors[path]))
+    print("Parsed {} of {} CyPhy2CAD output directories into {}".format(
+        len(results), len(cyphy2cad_output_dirs), args.output))
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
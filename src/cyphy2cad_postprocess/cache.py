@@ -0,0 +1,291 @@
+import os
+import json
+import errno
+import hashlib
+import tempfile
+from itertools import izip
+
+import numpy as np
+
+from reader import CyPhy2CADData, CYPHY2CAD_OUTPUT_FILES
+
+
+CACHE_VERSION = 5
+
+
+class ParseCache(object):
+    """Persistent cache of parsed CyPhy2CAD output directories.
+
+    Every entry is a ``<key>.npz`` and a small ``<key>.json`` manifest holding the fingerprint (path, size,
+    mtime and, with ``hash_contents``, the SHA-1) of each input file and the float columns. The npz holds
+    the same four arrays whatever the components look like: the ComponentIDs, the float values of every
+    column in one buffer, the rows they belong to, and the rest of the component data (names, units,
+    constraints, ...) as one JSON blob, decoded by the C scanner. A column is a path through the component
+    dicts with float values of one shape, such as ``('inertia', 'inertia_tensor_at_center_of_gravity')``;
+    a hit hands out its arrays as views into the buffer. An entry is only used while the fingerprint of
+    the output directory still matches. Entries are evicted least-recently-used first once the cache grows
+    beyond ``max_bytes``.
+
+    Pass an instance as ``CyPhy2CADReader(..., cache=ParseCache(cache_dir))`` to use it from ``parse()``.
+    """
+    def __init__(self, cache_dir, max_bytes=1024 * 1024 * 1024, hash_contents=False):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hash_contents = hash_contents
+
+    def fingerprint(self, cyphy2cad_output_dir):
+        fingerprint = []
+        for filename in CYPHY2CAD_OUTPUT_FILES:
+            path = os.path.abspath(os.path.join(cyphy2cad_output_dir, filename))
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return None
+            file_fingerprint = {'path': path, 'size': stat.st_size, 'mtime': stat.st_mtime}
+            if self.hash_contents:
+                file_fingerprint['sha1'] = _sha1(path)
+            fingerprint.append(file_fingerprint)
+        return fingerprint
+
+    def load(self, cyphy2cad_output_dir):
+        """Return the cached CyPhy2CADData of ``cyphy2cad_output_dir``, or None if missing or stale."""
+        manifest_path, arrays_path = self._entry_paths(cyphy2cad_output_dir)
+        try:
+            with open(manifest_path) as f_in:
+                manifest = json.loads(f_in.read())
+            if manifest.get('version') != CACHE_VERSION or \
+                    manifest.get('fingerprint') != self.fingerprint(cyphy2cad_output_dir):
+                return None
+            arrays = np.load(arrays_path)
+            try:
+                component_ids, components = _decode_columns(arrays, manifest['columns'])
+            finally:
+                arrays.close()
+        except (IOError, OSError, ValueError, KeyError):
+            return None
+        os.utime(manifest_path, None)  # mark as recently used
+
+        cad_data = CyPhy2CADData()
+        cad_data.components.update(zip(component_ids, components))
+        return cad_data
+
+    def store(self, cyphy2cad_output_dir, cad_data, fingerprint=None):
+        """Cache ``cad_data`` for ``cyphy2cad_output_dir``.
+
+        ``fingerprint`` should be taken with ``fingerprint()`` before the files were parsed, so a file
+        that changes while it is being parsed invalidates the entry.
+        """
+        if fingerprint is None:
+            fingerprint = self.fingerprint(cyphy2cad_output_dir)
+        if fingerprint is None:
+            return
+
+        named_arrays, columns = _encode_columns(cad_data.components)
+        manifest = {
+            'version': CACHE_VERSION,
+            'directory': os.path.abspath(cyphy2cad_output_dir),
+            'fingerprint': fingerprint,
+            'columns': columns
+        }
+
+        _makedirs(self.cache_dir)
+        manifest_path, arrays_path = self._entry_paths(cyphy2cad_output_dir)
+        # write the arrays before the manifest, so a manifest always has its arrays
+        _atomic_write(arrays_path, lambda f_out: np.savez(f_out, **named_arrays), self.cache_dir)
+        # json.dumps runs the C encoder, json.dump the pure Python one
+        _atomic_write(manifest_path, lambda f_out: f_out.write(json.dumps(manifest)), self.cache_dir)
+        self.evict(keep=manifest_path)
+
+    def invalidate(self, cyphy2cad_output_dir=None):
+        """Drop the entry of ``cyphy2cad_output_dir``, or every entry if no directory is given."""
+        if cyphy2cad_output_dir is not None:
+            paths = self._entry_paths(cyphy2cad_output_dir)
+        elif os.path.isdir(self.cache_dir):
+            paths = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+                     if name.endswith('.json') or name.endswith('.npz')]
+        else:
+            paths = []
+        for path in paths:
+            _remove(path)
+
+    def size(self):
+        return sum(entry_size for _, _, entry_size in self._entries())
+
+    def evict(self, keep=None):
+        """Drop least-recently-used entries until the cache fits in ``max_bytes``."""
+        entries = sorted(self._entries())
+        total = sum(entry_size for _, _, entry_size in entries)
+        for last_used, manifest_path, entry_size in entries:
+            if total <= self.max_bytes:
+                break
+            if manifest_path == keep:
+                continue
+            _remove(manifest_path)
+            _remove(manifest_path[:-len('.json')] + '.npz')
+            total -= entry_size
+
+    def _entries(self):
+        # (last used, manifest path, bytes) of every cache entry
+        if not os.path.isdir(self.cache_dir):
+            return []
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            manifest_path = os.path.join(self.cache_dir, name)
+            arrays_path = manifest_path[:-len('.json')] + '.npz'
+            try:
+                stat = os.stat(manifest_path)
+                entry_size = stat.st_size + (os.path.getsize(arrays_path) if os.path.exists(arrays_path) else 0)
+            except OSError:
+                continue  # removed by another process
+            entries.append((stat.st_mtime, manifest_path, entry_size))
+        return entries
+
+    def _entry_paths(self, cyphy2cad_output_dir):
+        key = hashlib.sha1(os.path.abspath(cyphy2cad_output_dir).encode('utf-8')).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + '.json', base + '.npz'
+
+
+def _encode_columns(components):
+    # (npz arrays, manifest columns) of components: the float leaves are moved into the columns, everything
+    # else stays in the JSON blob, where a float leaf of a list is a None placeholder
+    component_ids = sorted(components.keys())
+    columns = {}  # (path, shape or None for a float) to ([rows], [values])
+
+    def strip(path, row, value):
+        if isinstance(value, dict):
+            items = value.iteritems()
+            stripped = {}
+        elif isinstance(value, (list, tuple)):
+            items = enumerate(value)
+            stripped = [None] * len(value)
+        elif isinstance(value, (np.ndarray, np.generic)):
+            return value.tolist()
+        else:
+            return value
+        for key, item in items:
+            if isinstance(item, float):
+                column = columns.setdefault((path + (key,), None), ([], []))
+            elif isinstance(item, np.ndarray) and item.dtype == np.float64:
+                column = columns.setdefault((path + (key,), item.shape), ([], []))
+            else:
+                stripped[key] = strip(path + (key,), row, item)
+                continue
+            column[0].append(row)
+            column[1].append(item)
+        return stripped
+
+    skeletons = [strip((), row, components[comp]) for row, comp in enumerate(component_ids)]
+
+    manifest_columns = []
+    rows = [np.zeros(0, dtype=np.int64)]
+    floats = [np.zeros(0)]
+    for (path, shape), (column_rows, values) in columns.items():
+        manifest_columns.append({'path': list(path), 'shape': None if shape is None else list(shape),
+                                 'size': len(column_rows)})
+        rows.append(np.array(column_rows, dtype=np.int64))
+        floats.append(np.array(values, dtype=float).ravel())
+
+    named_arrays = {
+        'component_ids': np.array(component_ids, dtype=bytes) if component_ids else np.zeros(0, dtype='S1'),
+        'rows': np.concatenate(rows),
+        'floats': np.concatenate(floats),
+        'json': np.frombuffer(json.dumps(skeletons), dtype=np.uint8)
+    }
+    return named_arrays, manifest_columns
+
+
+def _decode_columns(arrays, manifest_columns):
+    # (ComponentIDs, component dicts) from the arrays and manifest columns written by _encode_columns
+    component_ids = arrays['component_ids'].tolist()
+    components = json.loads(arrays['json'].tostring(), object_hook=_StrDecoder())
+    rows = arrays['rows']
+    floats = arrays['floats']
+
+    row_offset = float_offset = 0
+    for manifest_column in manifest_columns:
+        path = [_str(key) for key in manifest_column['path']]
+        size = manifest_column['size']
+        shape = manifest_column['shape']
+        width = int(np.prod(shape)) if shape is not None else 1
+        column_rows = rows[row_offset:row_offset + size].tolist()
+        values = floats[float_offset:float_offset + size * width]
+        if shape is None:
+            values = values.tolist()
+        else:
+            values = list(values.reshape([size] + shape))  # views, not copies
+        row_offset += size
+        float_offset += size * width
+
+        parent_path, key = path[:-1], path[-1]
+        for row, value in izip(column_rows, values):
+            parent = components[row]
+            for parent_key in parent_path:
+                parent = parent[parent_key]
+            parent[key] = value
+    return component_ids, components
+
+
+class _StrDecoder(object):
+    # json object_hook turning unicode keys and values into str, as they are after parsing the XML; the same
+    # few keys recur in every component, so their conversions are memoized
+    def __init__(self):
+        self.keys = {}
+
+    def __call__(self, obj):
+        decoded = {}
+        for key, value in obj.iteritems():
+            str_key = self.keys.get(key)
+            if str_key is None:
+                str_key = self.keys[key] = key.encode('utf-8')
+            if isinstance(value, unicode):
+                value = value.encode('utf-8')
+            elif isinstance(value, list) and value and isinstance(value[0], unicode):
+                value = [_str(item) for item in value]
+            decoded[str_key] = value
+        return decoded
+
+
+def _str(value):
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    return value
+
+
+def _sha1(path):
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as f_in:
+        for chunk in iter(lambda: f_in.read(1024 * 1024), b''):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+def _atomic_write(path, write, tmp_dir):
+    fd, tmp_path = tempfile.mkstemp(dir=tmp_dir, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f_out:
+            write(f_out)
+        if os.name == 'nt':
+            _remove(path)  # os.rename does not replace on Windows
+        os.rename(tmp_path, path)
+    except Exception:
+        _remove(tmp_path)
+        raise
+
+
+def _makedirs(path):
+    try:
+        os.makedirs(path)
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError as e:
+        if e.errno != errno.ENOENT:
+            raise
@@ -0,0 +1,108 @@
+import numpy as np
+
+
+class ComponentTable(object):
+    """Struct-of-arrays view of ``CyPhy2CADData.components``.
+
+    Row ``i`` of every array belongs to ``component_ids[i]``; ``index`` maps a ComponentID to its row.
+    Fields a component does not have (e.g. the top assembly's rotation) are NaN; ``parent`` is -1 for the
+    top assembly and for components whose parent is unknown.
+
+    ============================  =========  ===================================================
+    mass, volume, surface_area    (N,)       scalars from CADAssembly_metrics.xml
+    translation                   (N, 3)     pose relative to the top assembly
+    rotation                      (N, 3, 3)
+    center_of_gravity             (N, 3)     in the component's default CSYS
+    inertia                       (N, 3, 3)  inertia tensor at the center of gravity
+    bounding_box                  (N, 3)     bounding box extents
+    outline_points                (N, 2, 3)  bounding box corners
+    cad_type                      (N,)       ASSEMBLY/PART
+    parent                        (N,)       row of the enclosing assembly in CADAssembly.xml
+    ============================  =========  ===================================================
+    """
+    def __init__(self, component_ids):
+        size = len(component_ids)
+        self.component_ids = list(component_ids)
+        self.index = {comp: row for row, comp in enumerate(self.component_ids)}
+
+        self.mass = np.full(size, np.nan)
+        self.volume = np.full(size, np.nan)
+        self.surface_area = np.full(size, np.nan)
+        self.translation = np.full((size, 3), np.nan)
+        self.rotation = np.full((size, 3, 3), np.nan)
+        self.center_of_gravity = np.full((size, 3), np.nan)
+        self.inertia = np.full((size, 3, 3), np.nan)
+        self.bounding_box = np.full((size, 3), np.nan)
+        self.outline_points = np.full((size, 2, 3), np.nan)
+        self.cad_type = np.empty(size, dtype=object)
+        self.parent = np.full(size, -1, dtype=np.intp)
+
+    @classmethod
+    def from_components(cls, components):
+        table = cls(sorted(components.keys()))
+        for row, comp in enumerate(table.component_ids):
+            table._fill_row(row, components[comp])
+        return table
+
+    def _fill_row(self, row, component_data):
+
+        def fill(array, value):
+            if value is not None:
+                array[row] = value
+
+        fill(self.mass, component_data.get('mass'))
+        fill(self.volume, component_data.get('volume'))
+        fill(self.surface_area, component_data.get('surface_area'))
+        fill(self.translation, component_data.get('translation'))
+        fill(self.rotation, component_data.get('rotation'))
+        fill(self.center_of_gravity, component_data.get('center_of_gravity'))
+        fill(self.inertia, (component_data.get('inertia') or {}).get('inertia_tensor_at_center_of_gravity'))
+        bounding_box = component_data.get('bounding_box') or {}
+        fill(self.bounding_box, bounding_box.get('bounding_box'))
+        outline_points = bounding_box.get('outline_points')
+        if outline_points is not None and len(outline_points) == self.outline_points.shape[1]:
+            self.outline_points[row] = outline_points
+        self.cad_type[row] = component_data.get('cad_type')
+        self.parent[row] = self.index.get(component_data.get('parent_component_id'), -1)
+
+    def __len__(self):
+        return len(self.component_ids)
+
+    def __contains__(self, comp):
+        return comp in self.index
+
+    def rows(self, component_ids):
+        """Row indices of ``component_ids``, as an integer array."""
+        return np.fromiter((self.index[comp] for comp in component_ids), dtype=np.intp)
+
+    def select(self, mask):
+        """ComponentIDs of the rows where the boolean ``mask`` is set."""
+        return [self.component_ids[row] for row in np.flatnonzero(mask)]
+
+    def parts(self):
+        """Boolean mask of the PART rows."""
+        return self.cad_type == 'PART'
+
+    def leaves(self):
+        """Boolean mask of the rows that are not the parent of another row.
+
+        Sub-assemblies with children are left out, so each part is counted once. Without parent links
+        (components loaded from an older dump) the rows with a pose, i.e. the top assembly's children.
+        """
+        if len(self) > 1 and not (self.parent >= 0).any():
+            return ~np.isnan(self.rotation).any(axis=(1, 2))
+        leaves = np.ones(len(self), dtype=bool)
+        leaves[self.parent[self.parent >= 0]] = False
+        return leaves
+
+    def total_mass(self, mask=None):
+        """Sum of the component masses over ``mask`` (``leaves()`` if not given), ignoring components
+        without a mass."""
+        if mask is None:
+            mask = self.leaves()
+        return float(np.nansum(self.mass[mask]))
+
+    def mass_above(self, threshold):
+        """ComponentIDs of every component heavier than ``threshold``."""
+        with np.errstate(invalid='ignore'):
+            return self.select(self.mass > threshold)
@@ -0,0 +1,149 @@
+import numpy as np
+
+
+class ConstraintGraph(object):
+    """Assembly constraints of ``CyPhy2CADData.components`` as a graph between components.
+
+    Every constraint Pair is an edge ``e`` between rows ``edge_rows[e, 0]`` and ``edge_rows[e, 1]`` of
+    ``component_ids``, constraining feature ``feature_names[e, 0]`` of the first to feature
+    ``feature_names[e, 1]`` of the second (``geometry_types[e]`` is AXIS, SURFACE, ...). The adjacency is
+    in CSR form: the neighbours of row ``i`` are ``indices[indptr[i]:indptr[i + 1]]``, reached through
+    the edges ``edge_ids`` at the same positions.
+    """
+    def __init__(self, component_ids, edge_rows, feature_names, geometry_types):
+        self.component_ids = list(component_ids)
+        self.index = {comp: row for row, comp in enumerate(self.component_ids)}
+        self.edge_rows = np.asarray(edge_rows, dtype=np.intp).reshape(-1, 2)
+        self.feature_names = np.asarray(feature_names, dtype=object).reshape(-1, 2)
+        self.geometry_types = np.asarray(geometry_types, dtype=object)
+
+        size = len(self.component_ids)
+        source = np.concatenate([self.edge_rows[:, 0], self.edge_rows[:, 1]])
+        target = np.concatenate([self.edge_rows[:, 1], self.edge_rows[:, 0]])
+        order = np.argsort(source, kind='mergesort')
+        self.indptr = np.zeros(size + 1, dtype=np.intp)
+        self.indptr[1:] = np.cumsum(np.bincount(source, minlength=size))
+        self.indices = target[order]
+        self.edge_ids = np.tile(np.arange(len(self.edge_rows)), 2)[order]
+
+    @classmethod
+    def from_components(cls, components):
+        """Build the graph of the ``constraints`` of ``components``.
+
+        Components a constraint refers to but that are not in ``components`` are added as nodes.
+        """
+        component_ids = set(components.keys())
+        pairs = []
+        for comp in components.keys():
+            for constraint in components[comp].get('constraints') or ():
+                for pair in constraint:
+                    features = pair['constraint_features']
+                    if len(features) != 2:
+                        continue
+                    pairs.append((features, pair.get('feature_geometry_type')))
+                    component_ids.update(feature['component_id'] for feature in features)
+
+        component_ids = sorted(component_ids)
+        index = {comp: row for row, comp in enumerate(component_ids)}
+        edge_rows = [[index[feature['component_id']] for feature in features] for features, _ in pairs]
+        feature_names = [[feature['feature_name'] for feature in features] for features, _ in pairs]
+        return cls(component_ids, edge_rows, feature_names, [geometry_type for _, geometry_type in pairs])
+
+    def __len__(self):
+        return len(self.component_ids)
+
+    def neighbors(self, comp):
+        """ComponentIDs of every component constrained to ``comp``."""
+        row = self.index[comp]
+        return set(self.component_ids[neighbor] for neighbor in self.indices[self.indptr[row]:self.indptr[row + 1]]
+                   if neighbor != row)
+
+    def constraints(self, comp):
+        """``(other ComponentID, own feature name, other feature name, geometry type)`` of each Pair of ``comp``."""
+        row = self.index[comp]
+        found = []
+        for position in range(self.indptr[row], self.indptr[row + 1]):
+            edge = self.edge_ids[position]
+            own_side = 0 if self.edge_rows[edge, 0] == row else 1
+            found.append((self.component_ids[self.indices[position]], self.feature_names[edge, own_side],
+                          self.feature_names[edge, 1 - own_side], self.geometry_types[edge]))
+        return found
+
+    def connected_component_labels(self):
+        """Label of the connected component of every row, numbered from 0 in order of first row."""
+        labels = np.arange(len(self))
+        source, target = self.edge_rows[:, 0], self.edge_rows[:, 1]
+        while True:
+            # hook every root to the smallest label across its edges, then jump to the new roots
+            lowest = np.minimum(labels[source], labels[target])
+            hooked = labels.copy()
+            np.minimum.at(hooked, labels[source], lowest)
+            np.minimum.at(hooked, labels[target], lowest)
+            while True:
+                jumped = hooked[hooked]
+                if np.array_equal(jumped, hooked):
+                    break
+                hooked = jumped
+            if np.array_equal(hooked, labels):
+                break
+            labels = hooked
+        _, first_rows, labels = np.unique(labels, return_index=True, return_inverse=True)
+        return np.argsort(np.argsort(first_rows))[labels]
+
+    def connected_components(self):
+        """ComponentIDs of each group of components constrained to each other, largest group first."""
+        labels = self.connected_component_labels()
+        groups = [[] for _ in range(labels.max() + 1 if len(labels) else 0)]
+        for row, label in enumerate(labels):
+            groups[label].append(self.component_ids[row])
+        return sorted(groups, key=len, reverse=True)
+
+    def cyclic(self):
+        """Boolean per connected component label: whether its constraints close a loop.
+
+        Several Pairs between the same two components count as one connection. A group of ``n``
+        components connected by more than ``n - 1`` distinct connections has a cycle.
+        """
+        labels = self.connected_component_labels()
+        links = self._links()
+        n_groups = labels.max() + 1 if len(labels) else 0
+        nodes = np.bincount(labels, minlength=n_groups)
+        edges = np.bincount(labels[links[:, 0]], minlength=n_groups)
+        return edges > nodes - 1
+
+    def loop_components(self):
+        """ComponentIDs of the components on a loop of constraints (or on a path joining two loops).
+
+        The 2-core of the graph: components with fewer than two distinct neighbours are peeled off one
+        after the other, each update only touching the neighbours of the peeled component.
+        """
+        links = self._links()
+        source = np.concatenate([links[:, 0], links[:, 1]])
+        target = np.concatenate([links[:, 1], links[:, 0]])
+        degree = np.bincount(source, minlength=len(self))
+        indptr = np.concatenate([[0], np.cumsum(degree)]).tolist()
+        neighbors = target[np.argsort(source, kind='mergesort')].tolist()
+        degree = degree.tolist()
+
+        peeled = [row for row in range(len(self)) if degree[row] < 2]
+        alive = [True] * len(self)
+        for row in peeled:
+            alive[row] = False
+        while peeled:
+            row = peeled.pop()
+            for neighbor in neighbors[indptr[row]:indptr[row + 1]]:
+                if alive[neighbor]:
+                    degree[neighbor] -= 1
+                    if degree[neighbor] < 2:
+                        alive[neighbor] = False
+                        peeled.append(neighbor)
+        return [comp for comp, on_loop in zip(self.component_ids, alive) if on_loop]
+
+    def _links(self):
+        # distinct connections between two different components, as (low row, high row)
+        links = np.sort(self.edge_rows, axis=1)
+        links = links[links[:, 0] != links[:, 1]]
+        if len(links) == 0:
+            return links
+        keys = np.unique(links[:, 0] * len(self) + links[:, 1])
+        return np.stack([keys // len(self), keys % len(self)], axis=1)
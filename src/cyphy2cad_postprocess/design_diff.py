@@ -0,0 +1,125 @@
+import numpy as np
+
+
+# ComponentTable fields compared by diff_designs
+DIFF_FIELDS = ('mass', 'volume', 'center_of_gravity', 'bounding_box', 'translation', 'rotation')
+
+
+class DesignDiff(object):
+    """Differences of many variant designs from a baseline design, aligned by ComponentID.
+
+    Rows are the components of the baseline (``component_ids``) and element ``k`` of the leading axis
+    belongs to ``designs[k]``:
+
+    ==================  ============  ====================================================
+    present             (K, N)        whether the variant has the baseline component
+    baseline[field]     (N, ...)      baseline ComponentTable column
+    values[field]       (K, N, ...)   variant value of the baseline component, NaN if absent
+    added               K lists       ComponentIDs only the variant has
+    removed             K lists       ComponentIDs only the baseline has
+    ==================  ============  ====================================================
+
+    A field of a component changed when any of its entries differs by more than ``atol + rtol * |baseline|``,
+    or is NaN on one side only (e.g. a pose given to the top assembly). ``atol`` and ``rtol`` are numbers or
+    dicts of them by field; fields missing from a dict are compared exactly.
+    """
+    def __init__(self, baseline_table, designs, atol=0.0, rtol=0.0):
+        self.designs = list(designs)
+        self.component_ids = baseline_table.component_ids
+        self.index = baseline_table.index
+        self.atol = atol
+        self.rtol = rtol
+
+        size = len(self.designs), len(self.component_ids)
+        self.present = np.zeros(size, dtype=bool)
+        self.baseline = {field: getattr(baseline_table, field) for field in DIFF_FIELDS}
+        self.values = {field: np.full(size + column.shape[1:], np.nan) for field, column in self.baseline.items()}
+        self.added = [[] for _ in self.designs]
+        self.removed = [[] for _ in self.designs]
+        self._changed = {}  # field to its changed() mask, until another variant is added
+
+    def add_variant(self, k, table):
+        """Align the ComponentTable of variant ``k`` to the baseline rows and fill in its values."""
+        if table.component_ids == self.component_ids:
+            baseline_rows = variant_rows = slice(None)  # same components, same order
+        else:
+            index = self.index
+            rows = np.array([index.get(comp, -1) for comp in table.component_ids], dtype=np.intp)
+            shared = rows >= 0
+            baseline_rows, variant_rows = rows[shared], np.flatnonzero(shared)
+            self.added[k] = [table.component_ids[row] for row in np.flatnonzero(~shared)]
+
+        self._changed = {}
+        self.present[k, baseline_rows] = True
+        for field, values in self.values.items():
+            values[k, baseline_rows] = getattr(table, field)[variant_rows]
+        if not self.present[k].all():
+            self.removed[k] = [self.component_ids[row] for row in np.flatnonzero(~self.present[k])]
+
+    def delta(self, field):
+        """(K, N, ...) variant minus baseline values of ``field``."""
+        return self.values[field] - self.baseline[field]
+
+    def changed(self, field=None):
+        """(K, N) whether ``field`` (any compared field if None) of each component present in a variant changed."""
+        if field is None:
+            changed = np.zeros(self.present.shape, dtype=bool)  # a new array: the cached masks stay as they are
+            for diff_field in DIFF_FIELDS:
+                changed |= self.changed(diff_field)
+            return changed
+
+        if field in self._changed:
+            return self._changed[field]
+        baseline = self.baseline[field]
+        values = self.values[field]
+        tolerance = _by_field(self.atol, field) + _by_field(self.rtol, field) * np.abs(baseline)
+        with np.errstate(invalid='ignore'):
+            exceeds = np.abs(values - baseline) > tolerance
+        exceeds |= np.isnan(values) != np.isnan(baseline)
+        exceeds = exceeds.reshape(self.present.shape + (int(np.prod(values.shape[2:])),)).any(axis=2)
+        self._changed[field] = exceeds & self.present
+        return self._changed[field]
+
+    def changes(self, design):
+        """``{ComponentID: [changed fields]}`` of variant ``design``."""
+        k = self.designs.index(design)
+        found = {}
+        for field in DIFF_FIELDS:
+            for row in np.flatnonzero(self.changed(field)[k]):
+                found.setdefault(self.component_ids[row], []).append(field)
+        return found
+
+    def changed_designs(self):
+        """The variants that add, remove or change a component."""
+        changed = self.changed().any(axis=1)
+        return [design for k, design in enumerate(self.designs)
+                if changed[k] or self.added[k] or self.removed[k]]
+
+
+def diff_designs(baseline, variants, atol=0.0, rtol=0.0):
+    """Compare the components of CyPhy2CADData ``baseline`` with those of each variant.
+
+    ``variants`` is a CyPhy2CADData, a list of them, or a dict of them such as the ``parse_many``
+    results; the returned DesignDiff is keyed by the list positions or the dict keys. Each variant is
+    aligned to the baseline rows once, with one dict lookup per component (none when both list the same
+    components), and the fields of all variants are then compared together.
+    """
+    if isinstance(variants, dict):
+        designs = list(variants.keys())
+        variants = [variants[design] for design in designs]
+    elif isinstance(variants, (list, tuple)):
+        designs = list(range(len(variants)))
+    else:
+        designs = [0]
+        variants = [variants]
+
+    diff = DesignDiff(baseline.table, designs, atol, rtol)
+    for k, variant in enumerate(variants):
+        diff.add_variant(k, variant.table)
+    return diff
+
+
+def _by_field(tolerance, field):
+    if isinstance(tolerance, dict):
+        return tolerance.get(field, 0.0)
+    return tolerance
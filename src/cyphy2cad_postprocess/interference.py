@@ -0,0 +1,141 @@
+import re
+
+import numpy as np
+
+
+INTERFERENCE_FILE = "CADAssembly_interference.txt"
+
+_HEADER_LINE = re.compile(r'^\s*([^:]+?)\s*:\s*(.*?)\s*$')
+_HEADER_FIELDS = {
+    'Assembly Name': 'assembly_name',
+    'MetricID': 'metric_id',
+    'InterferenceCount': 'interference_count'
+}
+# table columns, in the order of the report
+_PAIR_FIELDS = ('part_1_name', 'part_2_name', 'volume', 'units')
+
+_SWEEP_BLOCK = 1 << 20  # candidate pairs tested per sweep_and_prune step
+
+
+def read_interference_report(filename):
+    """Parse a ``CADAssembly_interference.txt`` report.
+
+    Returns a dict with the ``assembly_name``, ``metric_id``, ``interference_count``, whether the analysis
+    ``completed`` and the ``pairs``: one dict per table row with the ``part_1_name``, ``part_2_name``,
+    interference ``volume`` and its ``units``. The table columns are sliced on the dashed rule under the
+    column headers, so part names may hold spaces. Table rows without a numeric volume (a footer, a
+    truncated line, "N/A") are skipped and listed in ``warnings``.
+    """
+    report = {
+        'assembly_name': None,
+        'metric_id': None,
+        'interference_count': None,
+        'completed': False,
+        'pairs': [],
+        'warnings': []
+    }
+    with open(filename) as f_in:
+        lines = f_in.read().splitlines()
+
+    columns = None  # (start, stop) of each table column
+    for line_number, line in enumerate(lines, 1):
+        if line.startswith('Interference analysis'):
+            report['completed'] = 'completed successfully' in line
+            break
+        if columns is not None:
+            if not line.strip():
+                continue
+            values = [line[start:stop].strip() for start, stop in columns]
+            pair = dict(zip(_PAIR_FIELDS, values))
+            try:
+                pair['volume'] = float(pair['volume'])
+            except ValueError:
+                report['warnings'].append("line {}: skipped table row without an interference volume: {!r}".format(
+                    line_number, line.strip()))
+                continue
+            report['pairs'].append(pair)
+            continue
+        if line.startswith('---'):
+            columns = [match.span() for match in re.finditer(r'-+', line)]
+            columns[-1] = (columns[-1][0], None)
+            continue
+        match = _HEADER_LINE.match(line)
+        if match and match.group(1) in _HEADER_FIELDS and report[_HEADER_FIELDS[match.group(1)]] is None:
+            report[_HEADER_FIELDS[match.group(1)]] = match.group(2)
+
+    if report['interference_count'] is not None:
+        report['interference_count'] = int(report['interference_count'])
+    return report
+
+
+def interfering_components(report, components):
+    """ComponentID pairs of the report pairs, in order.
+
+    Parts are matched to components by ``cad_filename_generated``, ignoring case; a part name that
+    matches no component or more than one gives None.
+    """
+    name_to_comps = {}
+    for comp, component_data in components.items():
+        name = component_data.get('cad_filename_generated')
+        if name is not None:
+            name_to_comps.setdefault(name.lower(), []).append(comp)
+
+    def component_id(name):
+        comps = name_to_comps.get(name.lower(), ())
+        return comps[0] if len(comps) == 1 else None
+
+    return [(component_id(pair['part_1_name']), component_id(pair['part_2_name'])) for pair in report['pairs']]
+
+
+def sweep_and_prune(bounds, tolerance=0.0):
+    """Index pairs ``(i, j)``, ``i < j``, of the overlapping axis-aligned boxes ``bounds`` (N, 2, 3).
+
+    ``bounds[i]`` is the min and max corner of box ``i``; boxes closer than ``tolerance`` count as
+    overlapping and boxes with NaN corners never overlap. The boxes are sorted along the axis their centers
+    spread most along and each box is only tested against the boxes that start before it ends along that
+    axis, so the cost is O(N log N) plus the number of pairs overlapping along the axis. Returns an (M, 2)
+    array sorted by ``i`` then ``j``.
+    """
+    bounds = np.asarray(bounds, dtype=float)
+    valid = np.flatnonzero(~np.isnan(bounds).any(axis=(1, 2)))
+    lower = bounds[valid, 0] - tolerance / 2.0
+    upper = bounds[valid, 1] + tolerance / 2.0
+    axis = int(np.argmax(np.var(lower + upper, axis=0))) if len(valid) else 0
+    others = [other for other in range(3) if other != axis]
+
+    order = np.argsort(lower[:, axis], kind='mergesort')
+    # boxes order[a + 1:stop[a]] start before box order[a] ends along the axis
+    stop = np.searchsorted(lower[order, axis], upper[order, axis], side='right')
+    counts = np.maximum(stop - np.arange(1, len(order) + 1), 0)
+    ends = np.cumsum(counts)
+
+    pairs = [np.zeros((0, 2), dtype=np.intp)]
+    block_start = 0
+    while block_start < len(order):
+        # expand at most _SWEEP_BLOCK candidate pairs at a time
+        offset = ends[block_start] - counts[block_start]
+        block_stop = max(int(np.searchsorted(ends, offset + _SWEEP_BLOCK, side='right')), block_start + 1)
+        block_counts = counts[block_start:block_stop]
+        first = np.repeat(np.arange(block_start, block_stop), block_counts)
+        second = np.arange(block_counts.sum()) - np.repeat(ends[block_start:block_stop] - block_counts - offset,
+                                                           block_counts) + first + 1
+        i, j = order[first], order[second]
+        overlap = np.all((lower[i][:, others] <= upper[j][:, others]) &
+                         (lower[j][:, others] <= upper[i][:, others]), axis=1)
+        pairs.append(np.stack([i[overlap], j[overlap]], axis=1))
+        block_start = block_stop
+
+    pairs = np.sort(valid[np.concatenate(pairs)], axis=1)
+    return pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+
+
+def candidate_pairs(world_frame, tolerance=0.0):
+    """ComponentID pairs whose bounding boxes overlap in the top-assembly frame.
+
+    The broad phase of an interference check: components without a pose (the top assembly, which holds
+    all the others) are left out, and every real interference is among the candidates.
+    """
+    posed = np.flatnonzero(world_frame.posed)
+    pairs = sweep_and_prune(world_frame.bounds[posed], tolerance)
+    component_ids = world_frame.component_ids
+    return [(component_ids[posed[i]], component_ids[posed[j]]) for i, j in pairs]
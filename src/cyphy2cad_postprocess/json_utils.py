@@ -1,6 +1,8 @@
 import json
 import re
 
+import numpy as np
+
 
 # https://stackoverflow.com/a/33571117
 def json_load_byteified(file_handle):
@@ -17,6 +19,51 @@ def json_loads_byteified(json_text):
     )
 
 
+# component fields written as nested lists that are NumPy arrays once parsed
+ARRAY_FIELDS = frozenset(['rotation', 'translation', 'center_of_gravity', 'bounding_box', 'outline_points',
+                          'inertia_tensor_at_default_csys', 'inertia_tensor_at_center_of_gravity',
+                          'rotation_matrix', 'principle_moments'])
+
+
+def json_load_arrays(file_handle):
+    """Load JSON written by ``json_dump_reformatted`` with the ``ARRAY_FIELDS`` and link points as arrays.
+
+    Everything is rebuilt while the document is scanned, in one object_hook pass: strings become str and
+    the numeric lists are converted to float arrays in the objects holding them, so no second walk over
+    the loaded data is needed.
+    """
+    return json.load(file_handle, object_hook=_ArrayDecoder())
+
+
+def json_loads_arrays(json_text):
+    return json.loads(json_text, object_hook=_ArrayDecoder())
+
+
+class _ArrayDecoder(object):
+    # object_hook of json_load_arrays; the same few keys recur in every component, so their str
+    # conversions are memoized
+    def __init__(self):
+        self.keys = {}
+
+    def __call__(self, obj):
+        loaded = {}
+        for key, value in obj.iteritems():
+            str_key = self.keys.get(key)
+            if str_key is None:
+                str_key = self.keys[key] = key.encode('utf-8')
+            if isinstance(value, unicode):
+                value = value.encode('utf-8')
+            elif isinstance(value, list):
+                if str_key in ARRAY_FIELDS:
+                    value = np.array(value, dtype=float)
+                elif value and isinstance(value[0], unicode):
+                    value = [item.encode('utf-8') if isinstance(item, unicode) else item for item in value]
+            elif str_key == 'points' and isinstance(value, dict):
+                value = {name: np.array(point, dtype=float) for name, point in value.iteritems()}
+            loaded[str_key] = value
+        return loaded
+
+
 def _byteify(data, ignore_dicts=False):
     # if this is a unicode string, return its string representation
     if isinstance(data, unicode):
@@ -44,3 +91,145 @@ def json_reformat_lists(json_str):
 
     match_re = r'(\n*\s*\[)(\n\s*("*[\w\./\-\d]+"*,*\n\s*)+\])'  # FIXME: Simplify this garbage...
     return re.sub(match_re, newline_replace, json_str)
+
+
+# a list is written on one line when every element is a scalar matching this (see json_reformat_lists)
+_INLINE_TOKEN = re.compile(r'"*[\w\./\-\d]+"*$')
+_INDENT = "    "
+
+
+def json_dump_reformatted(obj, file_handle, buffer_size=4096):
+    """Stream ``obj`` to ``file_handle`` as sorted, indented JSON with scalar lists kept on one line.
+
+    The output is identical to ``json_reformat_lists(json.dumps(obj, indent=4, separators=(',', ': '),
+    sort_keys=True, cls=NumpyEncoder))`` but lists are formatted as they are written instead of
+    reformatting the whole document afterwards. ``buffer_size`` chunks are buffered between writes.
+    """
+    chunks = []
+
+    def write(chunk):
+        chunks.append(chunk)
+        if len(chunks) >= buffer_size:
+            file_handle.write("".join(chunks))
+            del chunks[:]
+
+    _write_json(obj, 0, write)
+    file_handle.write("".join(chunks))
+
+
+def json_dumps_reformatted(obj):
+    chunks = []
+    _write_json(obj, 0, chunks.append)
+    return "".join(chunks)
+
+
+def _write_json(obj, level, write):
+    if isinstance(obj, dict):
+        if not obj:
+            write("{}")
+            return
+        newline_indent = "\n" + _INDENT * (level + 1)
+        separator = "{" + newline_indent
+        for key, value in sorted(obj.items(), key=lambda kv: kv[0]):
+            write(separator + _encode_key(key) + ": ")
+            _write_json(value, level + 1, write)
+            separator = "," + newline_indent
+        write("\n" + _INDENT * level + "}")
+        return
+
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.kind == 'f' and obj.ndim > 0:
+            _write_float_array(obj, level, write)
+            return
+        obj = obj.tolist()
+    if isinstance(obj, (list, tuple)):
+        if not obj:
+            write("[]")
+            return
+        tokens = _inline_tokens(obj)
+        if tokens is not None:
+            write("[ " + ", ".join(tokens) + " ]")
+            return
+        newline_indent = "\n" + _INDENT * (level + 1)
+        separator = "[" + newline_indent
+        for value in obj:
+            write(separator)
+            _write_json(value, level + 1, write)
+            separator = "," + newline_indent
+        write("\n" + _INDENT * level + "]")
+        return
+
+    write(_encode_scalar(obj))
+
+
+def _write_float_array(array, level, write):
+    # fast path for the numeric arrays that make up most of the output
+    if len(array) == 0:
+        write("[]")
+        return
+    if array.ndim == 1:
+        if np.isfinite(array).all():
+            line = ", ".join(map(repr, array.tolist()))
+            if "+" not in line:
+                write("[ " + line + " ]")
+                return
+        _write_json(array.tolist(), level, write)
+        return
+    newline_indent = "\n" + _INDENT * (level + 1)
+    separator = "[" + newline_indent
+    for row in array:
+        write(separator)
+        _write_float_array(row, level + 1, write)
+        separator = "," + newline_indent
+    write("\n" + _INDENT * level + "]")
+
+
+def _inline_tokens(values):
+    tokens = []
+    for value in values:
+        if isinstance(value, (dict, list, tuple, np.ndarray)):
+            return None
+        token = _encode_scalar(value)
+        if not _INLINE_TOKEN.match(token):
+            return None
+        tokens.append(token)
+    return tokens
+
+
+def _encode_float(value):
+    # same as the json module's float encoding
+    if value != value:
+        return "NaN"
+    if value == float("inf"):
+        return "Infinity"
+    if value == -float("inf"):
+        return "-Infinity"
+    return repr(value)
+
+
+def _encode_scalar(obj):
+    if isinstance(obj, float):
+        return _encode_float(obj)
+    if isinstance(obj, basestring):
+        return json.encoder.encode_basestring_ascii(obj)
+    if obj is None:
+        return "null"
+    if obj is True:
+        return "true"
+    if obj is False:
+        return "false"
+    if isinstance(obj, (int, long)):
+        return str(obj)
+    if isinstance(obj, (np.float32, np.float64)):
+        return _encode_float(float(obj))
+    raise TypeError(repr(obj) + " is not JSON serializable")
+
+
+def _encode_key(key):
+    if isinstance(key, basestring):
+        return json.encoder.encode_basestring_ascii(key)
+    if isinstance(key, float):
+        return '"' + _encode_float(key) + '"'
+    if key is True or key is False or key is None or isinstance(key, (int, long)):
+        return '"' + _encode_scalar(key) + '"'
+    raise TypeError("key " + repr(key) + " is not a string")
@@ -0,0 +1,156 @@
+import heapq
+
+import numpy as np
+
+from interference import sweep_and_prune
+
+
+class LinkPointIndex(object):
+    """KD-tree over the link points of all components.
+
+    Queries answer with ``(component_id, point_name, distance)`` tuples. The tree is stored in flat
+    arrays: node ``n`` covers the points ``start[n]:stop[n]`` of the tree order, bounded by ``lower[n]``
+    and ``upper[n]``, and has children ``left[n]`` and ``right[n]`` (-1 for a leaf of at most
+    ``leaf_size`` points, whose distances are computed in one NumPy operation).
+    """
+    def __init__(self, points, component_ids, names, leaf_size=8):
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        self.leaf_size = leaf_size
+
+        order = np.arange(len(points))
+        start, stop, left, right = [], [], [], []
+        if len(points):
+            start.append(0)
+            stop.append(len(points))
+            left.append(-1)
+            right.append(-1)
+        pending = [0] if len(points) else []
+        while pending:
+            node = pending.pop()
+            node_points = order[start[node]:stop[node]]
+            if len(node_points) <= leaf_size:
+                continue
+            extent = points[node_points].max(axis=0) - points[node_points].min(axis=0)
+            axis = int(np.argmax(extent))
+            middle = len(node_points) // 2
+            node_points[:] = node_points[np.argpartition(points[node_points, axis], middle)]
+            for child_start, child_stop in ((start[node], start[node] + middle),
+                                            (start[node] + middle, stop[node])):
+                start.append(child_start)
+                stop.append(child_stop)
+                left.append(-1)
+                right.append(-1)
+                pending.append(len(start) - 1)
+            left[node], right[node] = len(start) - 2, len(start) - 1
+
+        self.points = points[order]
+        self.component_ids = np.asarray(component_ids, dtype=object)[order]
+        self.names = np.asarray(names, dtype=object)[order]
+        self.start = np.array(start, dtype=np.intp)
+        self.stop = np.array(stop, dtype=np.intp)
+        self.left = np.array(left, dtype=np.intp)
+        self.right = np.array(right, dtype=np.intp)
+        self.lower = np.array([self.points[a:b].min(axis=0) for a, b in zip(start, stop)]).reshape(-1, 3)
+        self.upper = np.array([self.points[a:b].max(axis=0) for a, b in zip(start, stop)]).reshape(-1, 3)
+
+    @classmethod
+    def from_world_frame(cls, world_frame, leaf_size=8):
+        component_ids = np.asarray(world_frame.component_ids, dtype=object)[world_frame.link_point_rows]
+        return cls(world_frame.link_points, component_ids, world_frame.link_point_names, leaf_size)
+
+    def __len__(self):
+        return len(self.points)
+
+    def nearest(self, point, exclude_component=None):
+        """The link point closest to ``point``, skipping the points of ``exclude_component``; None if empty."""
+        point = np.asarray(point, dtype=float)
+        best_distance, best = np.inf, None
+        nodes = [(0.0, 0)] if len(self.start) else []
+        while nodes:
+            node_distance, node = heapq.heappop(nodes)
+            if node_distance >= best_distance:
+                break
+            if self.left[node] < 0:
+                distances = self._leaf_distances(node, point)
+                if exclude_component is not None:
+                    distances[self.component_ids[self.start[node]:self.stop[node]] == exclude_component] = np.inf
+                closest = int(np.argmin(distances))
+                if distances[closest] < best_distance:
+                    best_distance, best = distances[closest], self.start[node] + closest
+                continue
+            for child in (self.left[node], self.right[node]):
+                heapq.heappush(nodes, (self._box_distance(child, point), child))
+        if best is None:
+            return None
+        return self.component_ids[best], self.names[best], float(best_distance)
+
+    def within(self, point, radius):
+        """Every link point within ``radius`` of ``point``, closest first."""
+        point = np.asarray(point, dtype=float)
+        found = []
+        nodes = [0] if len(self.start) else []
+        while nodes:
+            node = nodes.pop()
+            if self._box_distance(node, point) > radius:
+                continue
+            if self.left[node] >= 0:
+                nodes.extend((self.left[node], self.right[node]))
+                continue
+            distances = self._leaf_distances(node, point)
+            for offset in np.flatnonzero(distances <= radius):
+                found.append((float(distances[offset]), self.start[node] + offset))
+        return [(self.component_ids[i], self.names[i], distance) for distance, i in sorted(found)]
+
+    def mating_pairs(self, tolerance):
+        """Pairs of link points of different components within ``tolerance`` of each other.
+
+        Returns ``(component_id, point_name, component_id, point_name, distance)`` tuples ordered by
+        distance. The points are hashed to a uniform grid of ``tolerance`` sized cells and only points in
+        neighbouring cells are compared, all cells at once.
+        """
+        pairs = _grid_pairs(self.points, tolerance)
+        if pairs is None:  # grid too fine to hash: sweep the points instead
+            pairs = sweep_and_prune(np.stack([self.points, self.points], axis=1), tolerance)
+        i, j = pairs[:, 0], pairs[:, 1]
+        distances = np.linalg.norm(self.points[i] - self.points[j], axis=1)
+        mating = np.flatnonzero((distances <= tolerance) & (self.component_ids[i] != self.component_ids[j]))
+        mating = mating[np.argsort(distances[mating], kind='mergesort')]
+        return [(self.component_ids[i[m]], self.names[i[m]], self.component_ids[j[m]], self.names[j[m]],
+                 float(distances[m])) for m in mating]
+
+    def _leaf_distances(self, node, point):
+        return np.linalg.norm(self.points[self.start[node]:self.stop[node]] - point, axis=1)
+
+    def _box_distance(self, node, point):
+        gap = np.maximum(np.maximum(self.lower[node] - point, point - self.upper[node]), 0.0)
+        return float(np.sqrt(gap.dot(gap)))
+
+
+def _grid_pairs(points, cell_size):
+    # index pairs (i, j), i < j, of the points in the same or neighbouring cells of a uniform grid;
+    # None if the grid has too many cells to number them in an int64
+    if cell_size <= 0 or len(points) == 0:
+        return None
+    cells = np.floor((points - points.min(axis=0)) / cell_size).astype(np.int64) + 1
+    dims = cells.max(axis=0) + 2  # a cell of padding on either side, so no neighbour wraps around
+    if np.prod(dims.astype(float)) >= 2.0 ** 62:
+        return None
+    strides = np.array([dims[1] * dims[2], dims[2], 1], dtype=np.int64)
+    keys = cells.dot(strides)
+    order = np.argsort(keys, kind='mergesort')
+    sorted_keys = keys[order]
+
+    pairs = []
+    # the cell itself and the 13 neighbours after it, so every pair of cells is visited once
+    offsets = [(a, b, c) for a in (-1, 0, 1) for b in (-1, 0, 1) for c in (-1, 0, 1) if (a, b, c) >= (0, 0, 0)]
+    for offset in offsets:
+        neighbour_keys = sorted_keys + np.dot(offset, strides)
+        first = np.searchsorted(sorted_keys, neighbour_keys, side='left')
+        last = np.searchsorted(sorted_keys, neighbour_keys, side='right')
+        if offset == (0, 0, 0):
+            first = np.arange(1, len(sorted_keys) + 1)  # later points of the same cell only
+        counts = np.maximum(last - first, 0)
+        source = np.repeat(np.arange(len(sorted_keys)), counts)
+        target = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(first, counts)
+        pairs.append(np.stack([order[source], order[target]], axis=1))
+    return np.sort(np.concatenate(pairs), axis=1)
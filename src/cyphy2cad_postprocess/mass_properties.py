@@ -0,0 +1,134 @@
+import numpy as np
+
+
+def roll_up(mass, center_of_gravity, inertia, rotation, translation, groups=None, n_groups=None):
+    """Mass properties of assemblies from the mass properties and poses of their children.
+
+    Row ``i`` is a child of assembly ``groups[i]`` (every row belongs to assembly 0 if ``groups`` is not
+    given): its ``mass`` (N,), ``center_of_gravity`` (N, 3) and ``inertia`` (N, 3, 3) tensor at the CG in
+    its own frame, and its pose ``rotation`` (N, 3, 3) and ``translation`` (N, 3) in the assembly frame.
+    Returns the assembly ``(mass, center_of_gravity, inertia)`` with a leading axis of ``n_groups``; the
+    inertia tensors are rotated into the assembly frame and moved to the assembly CG with the parallel
+    axis theorem.
+    """
+    if groups is None:
+        groups = np.zeros(len(mass), dtype=np.intp)
+    if n_groups is None:
+        n_groups = int(groups.max()) + 1 if len(groups) else 0
+
+    center_of_gravity = np.einsum('nij,nj->ni', rotation, center_of_gravity) + translation
+    total_mass = _group_sum(mass, groups, n_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        total_center_of_gravity = _group_sum(mass[:, np.newaxis] * center_of_gravity, groups, n_groups) / \
+            total_mass[:, np.newaxis]
+
+    offset = center_of_gravity - total_center_of_gravity[groups]
+    inertia = np.einsum('nij,njk,nlk->nil', rotation, inertia, rotation)
+    inertia += mass[:, np.newaxis, np.newaxis] * (
+        np.einsum('ni,ni->n', offset, offset)[:, np.newaxis, np.newaxis] * np.eye(3) -
+        np.einsum('ni,nj->nij', offset, offset))
+    return total_mass, total_center_of_gravity, _group_sum(inertia, groups, n_groups)
+
+
+class MassPropertyCheck(object):
+    """Rolled-up and reported top-assembly mass properties of many designs.
+
+    Element ``i`` of every array belongs to ``designs[i]``. The errors are relative: to the reported mass,
+    to the diagonal of the top assembly bounding box for the CG, and to the largest reported inertia
+    tensor entry. A design passes when every error is within ``rtol``; a design without a top assembly
+    or with a component missing its mass properties fails.
+    """
+    def __init__(self, designs, rtol):
+        size = len(designs)
+        self.designs = list(designs)
+        self.rtol = rtol
+
+        self.mass = np.full(size, np.nan)
+        self.center_of_gravity = np.full((size, 3), np.nan)
+        self.inertia = np.full((size, 3, 3), np.nan)
+        self.reported_mass = np.full(size, np.nan)
+        self.reported_center_of_gravity = np.full((size, 3), np.nan)
+        self.reported_inertia = np.full((size, 3, 3), np.nan)
+        self.size = np.full(size, np.nan)  # diagonal of the top assembly bounding box
+
+    @property
+    def mass_error(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.abs(self.mass - self.reported_mass) / np.abs(self.reported_mass)
+
+    @property
+    def center_of_gravity_error(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.linalg.norm(self.center_of_gravity - self.reported_center_of_gravity, axis=1) / self.size
+
+    @property
+    def inertia_error(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.abs(self.inertia - self.reported_inertia).max(axis=(1, 2)) / \
+                np.abs(self.reported_inertia).max(axis=(1, 2))
+
+    @property
+    def passed(self):
+        with np.errstate(invalid='ignore'):
+            return (self.mass_error <= self.rtol) & (self.center_of_gravity_error <= self.rtol) & \
+                (self.inertia_error <= self.rtol)
+
+    def failed(self):
+        """The designs that did not pass."""
+        return [self.designs[i] for i in np.flatnonzero(~self.passed)]
+
+
+def check_mass_properties(cad_data, rtol=1e-3):
+    """Roll up the mass properties of the top assembly of each design and compare with the reported ones.
+
+    ``cad_data`` is a CyPhy2CADData, a list of them, or a dict of them such as the ``parse_many``
+    results; the returned MassPropertyCheck is keyed by the list positions or the dict keys. The top
+    assembly is the component without a pose and only its direct children in CADAssembly.xml are rolled up:
+    the parts of a sub-assembly are already in the sub-assembly's mass properties. Components recorded
+    without a parent (e.g. loaded from an older dump) count as children when they have a pose. All designs
+    are rolled up together in one batch.
+    """
+    if isinstance(cad_data, dict):
+        designs = list(cad_data.keys())
+        cad_data = [cad_data[design] for design in designs]
+    elif isinstance(cad_data, (list, tuple)):
+        designs = list(range(len(cad_data)))
+    else:
+        designs = [0]
+        cad_data = [cad_data]
+    check = MassPropertyCheck(designs, rtol)
+
+    columns = {'mass': [], 'center_of_gravity': [], 'inertia': [], 'rotation': [], 'translation': []}
+    groups = []
+    for design, design_data in enumerate(cad_data):
+        table = design_data.table
+        posed = ~np.isnan(table.rotation).any(axis=(1, 2))
+        tops = np.flatnonzero(~posed)
+        if len(tops) == 0:
+            continue
+        top = tops[0]
+        children = posed & ((table.parent == top) | (table.parent < 0))
+        check.reported_mass[design] = table.mass[top]
+        check.reported_center_of_gravity[design] = table.center_of_gravity[top]
+        check.reported_inertia[design] = table.inertia[top]
+        check.size[design] = np.linalg.norm(table.bounding_box[top])
+
+        for name, column in columns.items():
+            column.append(getattr(table, name)[children])
+        groups.append(np.full(np.count_nonzero(children), design, dtype=np.intp))
+
+    if groups:
+        check.mass, check.center_of_gravity, check.inertia = roll_up(
+            np.concatenate(columns['mass']), np.concatenate(columns['center_of_gravity']),
+            np.concatenate(columns['inertia']), np.concatenate(columns['rotation']),
+            np.concatenate(columns['translation']), np.concatenate(groups), len(designs))
+    return check
+
+
+def _group_sum(values, groups, n_groups):
+    # sum of the rows of ``values`` per group, one bincount per column
+    flat = values.reshape(len(values), int(np.prod(values.shape[1:])))
+    sums = np.empty((n_groups, flat.shape[1]))
+    for column in range(flat.shape[1]):
+        sums[:, column] = np.bincount(groups, weights=flat[:, column], minlength=n_groups)
+    return sums.reshape((n_groups,) + values.shape[1:])
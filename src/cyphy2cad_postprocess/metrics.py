@@ -0,0 +1,145 @@
+import numpy as np
+
+
+REQUESTED_METRICS_FILE = "RequestedMetrics.xml"
+
+# requested metric fields and the RequestedMetrics.xml Metric attributes they come from
+REQUESTED_METRIC_FIELDS = (
+    ('metric_id', 'MetricID'),
+    ('metric_type', 'MetricType'),
+    ('requested_value_type', 'RequestedValueType'),
+    ('component_instance_id', 'ComponentInstanceID'),
+    ('component_name', 'ComponentName'),
+    ('component_type', 'ComponentType'),
+    ('details', 'Details')
+)
+
+
+def read_requested_metric(metric):
+    """RequestedMetrics.xml ``Metric`` element to a dict."""
+    return {field: metric.get(attribute) for field, attribute in REQUESTED_METRIC_FIELDS}
+
+
+def read_computed_metrics(component):
+    """``(metrics, complex_metrics)`` of a ComputedValues.xml ``Component`` element.
+
+    Every ``Metric`` is a dict with its parsed ``value``: a float for a SCALAR, an array otherwise.
+    Every ``ComplexMetric`` is a dict holding its own ``metrics``, which have no MetricID of their own.
+    """
+    comp = component.get('ComponentInstanceID')
+    metrics = []
+    complex_metrics = []
+    for metrics_elem in component.findall('Metrics'):
+        for elem in metrics_elem:
+            if elem.tag == 'Metric':
+                metrics.append(_read_computed_metric(elem, comp))
+            elif elem.tag == 'ComplexMetric':
+                complex_metrics.append({
+                    'component_instance_id': comp,
+                    'metric_id': elem.get('MetricID'),
+                    'type': elem.get('Type'),
+                    'sub_type': elem.get('SubType'),
+                    'data_format': elem.get('DataFormat'),
+                    'metrics': [_read_computed_metric(metric, comp) for metric in elem.findall('Metric')]
+                })
+    return metrics, complex_metrics
+
+
+def _read_computed_metric(metric, comp):
+    array_value = metric.get('ArrayValue')
+    value = None
+    if array_value is not None:
+        value = np.array([float(x) for x in array_value.split(";")])
+        if metric.get('Type') == 'SCALAR' and len(value) == 1:
+            value = float(value[0])
+    return {
+        'component_instance_id': comp,
+        'metric_id': metric.get('MetricID'),
+        'metric_name': metric.get('MetricName'),
+        'type': metric.get('Type'),
+        'data_format': metric.get('DataFormat'),
+        'units': metric.get('Units'),
+        'value': value
+    }
+
+
+class MetricIndex(object):
+    """Requested metrics joined to their computed values, keyed by MetricID.
+
+    Each entry is a dict holding the requested fields (see ``read_requested_metric``; None if the metric
+    was not requested), the computed ``value``, ``units`` and ``type`` (None if it was not computed),
+    ``requested`` and ``computed`` flags, and ``component``, the data of its component in
+    ``CyPhy2CADData.components`` (None if there is no such component). The index is built in one hash
+    join: the computed metrics are hashed by MetricID and every requested metric probes them once;
+    afterwards every lookup is a dict access.
+
+    An InterferenceCount is computed into the interference report rather than into ComputedValues.xml;
+    pass the report to join it too.
+    """
+    def __init__(self, requested, computed, complex_metrics=(), components=None, interference=None):
+        computed_by_id = {}
+        for metric in computed:
+            if metric['metric_id']:
+                computed_by_id[metric['metric_id']] = metric
+        if interference is not None and interference.get('metric_id'):
+            computed_by_id.setdefault(interference['metric_id'], {
+                'component_instance_id': None,
+                'metric_id': interference['metric_id'],
+                'type': 'SCALAR',
+                'units': None,
+                'value': interference['interference_count']
+            })
+
+        self._metrics = {}
+        self._component_metrics = {}  # ComponentInstanceID to its MetricIDs
+        for request in requested:
+            self._add(request, computed_by_id.pop(request['metric_id'], None), components)
+        for metric_id, metric in computed_by_id.items():
+            self._add(None, metric, components)
+
+        self._complex_metrics = {}  # ComponentInstanceID to its ComplexMetrics
+        for complex_metric in complex_metrics:
+            self._complex_metrics.setdefault(complex_metric['component_instance_id'], []).append(complex_metric)
+
+    def _add(self, request, metric, components):
+        entry = dict(request) if request is not None else {field: None for field, _ in REQUESTED_METRIC_FIELDS}
+        entry['requested'] = request is not None
+        entry['computed'] = metric is not None and metric['value'] is not None
+        for field in ('value', 'units', 'type'):
+            entry[field] = metric[field] if metric is not None else None
+        if request is None:
+            entry['metric_id'] = metric['metric_id']
+            entry['component_instance_id'] = metric['component_instance_id']
+
+        comp = entry['component_instance_id']
+        entry['component'] = components.get(comp) if components is not None else None
+        self._metrics[entry['metric_id']] = entry
+        self._component_metrics.setdefault(comp, []).append(entry['metric_id'])
+
+    def __getitem__(self, metric_id):
+        return self._metrics[metric_id]
+
+    def __contains__(self, metric_id):
+        return metric_id in self._metrics
+
+    def __iter__(self):
+        return iter(self._metrics)
+
+    def __len__(self):
+        return len(self._metrics)
+
+    def get(self, metric_id, default=None):
+        return self._metrics.get(metric_id, default)
+
+    def for_component(self, comp):
+        """Metric entries of ComponentInstanceID ``comp``."""
+        return [self._metrics[metric_id] for metric_id in self._component_metrics.get(comp, ())]
+
+    def complex_metrics(self, comp):
+        """ComplexMetrics computed for ComponentInstanceID ``comp``."""
+        return list(self._complex_metrics.get(comp, ()))
+
+    def missing(self):
+        """Entries of the requested metrics that were never computed, ordered by MetricID."""
+        return [entry for metric_id, entry in sorted(self._metrics.items())
+                if entry['requested'] and not entry['computed']]
@@ -1,18 +1,56 @@
 import os
-import xml.etree.ElementTree as et
-import json
+import time
+try:
+    import xml.etree.cElementTree as et
+except ImportError:
+    import xml.etree.ElementTree as et
 from collections import defaultdict
+from contextlib import contextmanager
+from functools import partial
 
 import numpy as np
 
-from json_encoders import NumpyEncoder
-from json_utils import json_reformat_lists
+from component_table import ComponentTable
+from constraint_graph import ConstraintGraph
+from interference import INTERFERENCE_FILE, read_interference_report
+from link_point_index import LinkPointIndex
+from metrics import REQUESTED_METRICS_FILE, MetricIndex, read_computed_metrics, read_requested_metric
+from stats import ReaderStats
+from units import converted_units, group_by_units, unit_factors
+from world_frame import WorldFrame
+from json_utils import json_dump_reformatted, json_dumps_reformatted, json_load_arrays, json_loads_arrays
+
+
+CYPHY2CAD_OUTPUT_FILES = ("CADAssembly.xml", "CADAssembly_metrics.xml", "ComputedValues.xml")
+
+# component fields recorded from each output file
+CADASSEMBLY_FIELDS = ('component_name', 'cad_filename_original', 'cad_type', 'parent_component_id', 'constraints')
+CADASSEMBLY_METRICS_FIELDS = ('metric_id', 'rotation', 'translation', 'coordinate_system', 'cad_filename_generated',
+                              'bounding_box', 'center_of_gravity', 'inertia', 'surface_area', 'volume', 'mass',
+                              'units')
+COMPUTED_VALUES_FIELDS = ('points',)
 
 
 class CyPhy2CADReader(object):
-    def __init__(self, cyphy2cad_output_dir=None, parse=False):
+    def __init__(self, cyphy2cad_output_dir=None, parse=False, keep_xml=False, cache=None, lazy=False,
+                 instrument=False, stats_hook=None, units=None):
 
         self._cad_data = None
+        self.keep_xml = keep_xml  # keep the raw ElementTree roots on the parsed CyPhy2CADData
+        self.cache = cache        # optional ParseCache consulted by parse()
+        self.lazy = lazy          # parse each output file the first time one of its fields is accessed
+        # convert lengths and masses to these 'distance' and 'mass' units while parsing (e.g. units.SI_UNITS);
+        # the force, temperature and time units are left as reported. The cache holds data in the reported
+        # units, so parse() and refresh() neither read nor write it while units are set
+        self.units = units
+        # ReaderStats of every parse stage and serialization, if instrumenting (a stats_hook implies it)
+        self.stats = ReaderStats(stats_hook) if instrument or stats_hook is not None else None
+        self._stage = None        # StageStats of the running stage, if instrumenting
+
+        self._parsed_dir = None   # output directory of the last parse()
+        self._file_states = {}    # output file name to (size, mtime) when it was last parsed
+        self._file_components = {}  # output file name to the ComponentIDs it recorded
+        self._computed_metrics = None  # (metrics, complex metrics) mined by the last ComputedValues.xml parse
 
         if not cyphy2cad_output_dir:
             cyphy2cad_output_dir = os.getcwd()
@@ -30,197 +68,771 @@ class CyPhy2CADReader(object):
         if not cyphy2cad_output_dir:
             cyphy2cad_output_dir = self.cyphy2cad_output_dir
 
+        self._parsed_dir = cyphy2cad_output_dir
+        self._file_states = {filename: _file_state(os.path.join(cyphy2cad_output_dir, filename))
+                             for filename in CYPHY2CAD_OUTPUT_FILES}
+        self._file_components = {}
+        self._computed_metrics = None
+        if self.stats is not None:
+            self.stats.reset()
+
+        use_cache = self.cache is not None and not self.keep_xml and self.units is None
+        if use_cache:
+            with self._measure('cache'):
+                cad_data = self.cache.load(cyphy2cad_output_dir)
+            if cad_data is not None:
+                self._cad_data = cad_data
+                self._cad_data.stats = self.stats
+                # what each file recorded, so refresh() can drop the components a changed file no longer lists
+                for filename, parse_stage, fields in self._stages():
+                    self._file_components[filename] = _recorded_components(cad_data.components, fields)
+                self._parse_interference_txt(cyphy2cad_output_dir)
+                self._cad_data._defer_metrics(cyphy2cad_output_dir, None)
+                return self._cad_data
+            fingerprint = self.cache.fingerprint(cyphy2cad_output_dir)  # taken before reading the files
+
         self._cad_data = CyPhy2CADData()
+        self._cad_data.stats = self.stats
+        self._parse_interference_txt(cyphy2cad_output_dir)
+
+        if self.lazy:
+            field_files = {}
+            for filename, parse_stage, fields in self._stages():
+                field_files.update((field, filename) for field in fields)
+            # bound to this data and directory: the reader may parse another directory before they are loaded
+            self._cad_data.components = _LazyComponents(
+                field_files, partial(self._parse_lazy_file, self._cad_data, cyphy2cad_output_dir))
+            return self._cad_data
 
-        self._parse_cadassembly_xml(cyphy2cad_output_dir)
-        self._parse_cadassembly_metrics_xml(cyphy2cad_output_dir)
-        self._parse_computed_values_xml(cyphy2cad_output_dir)
+        for filename, parse_stage, fields in self._stages():
+            with self._measure(filename):
+                self._file_components[filename] = parse_stage(cyphy2cad_output_dir, self._cad_data)
+        self._cad_data._defer_metrics(cyphy2cad_output_dir, self._computed_metrics)
+
+        if use_cache:
+            self.cache.store(cyphy2cad_output_dir, self._cad_data, fingerprint)
 
         return self._cad_data
 
-    def _parse_cadassembly_xml(self, path):
-        elem_tree = et.parse(os.path.join(path, "CADAssembly.xml"))
-        root_elem = elem_tree.getroot()
-        self._cad_data.cadassembly = root_elem
+    def refresh(self):
+        """Re-parse only the output files that changed since the last ``parse()`` or ``refresh()``.
 
-        comp_to_component_display_name = {}   # ComponentID to Component Display Name
-        comp_to_cad_file_name_original = {}   # ComponentID to Original CAD File Name
-        comp_to_type = {}                     # ComponentID to CAD Component Type (ASSEMBLY/PART)
-        comp_to_constraints = {}              # ComponentID to CAD Assembly Constraint
+        The fields recorded from a changed file are updated in place on the existing components of
+        ``cad_data``; components the file no longer lists lose those fields. Returns the names of the
+        re-parsed files. Parses everything if nothing has been parsed yet.
+        """
+        if self._cad_data is None:
+            self.parse()
+            return list(CYPHY2CAD_OUTPUT_FILES)
 
-        # mine CAD component data
-        for cad_comp in root_elem.iter('CADComponent'):
-            comp = cad_comp.get('ComponentID')
-            comp_to_component_display_name[comp] = cad_comp.get('DisplayName')
-            comp_to_cad_file_name_original[comp] = cad_comp.get('Name')
-            comp_to_type[comp] = cad_comp.get('Type')
-            constraints = []
-            for constraint in cad_comp.findall('Constraint'):
-                pairs = []
-                # TODO
-            if len(constraints) > 0:
-                comp_to_constraints[comp] = constraints
+        path = self._parsed_dir
+        use_cache = self.cache is not None and not self.keep_xml and self.units is None
+        if use_cache:
+            fingerprint = self.cache.fingerprint(path)
 
-        # record CAD component data
-        for comp, met in comp_to_component_display_name.items():  # FIXME: items() instead of iteritems() for Python3 compatibility
-            component_data = {
-                'component_name': comp_to_component_display_name[comp],
-                'cad_filename_original': comp_to_cad_file_name_original[comp],
-                'cad_type': comp_to_type[comp]
-                # TODO: 'constraints': comp_to_constraints.get(comp, None)
-            }
-            self._cad_data.components[comp].update(component_data)
+        if self.stats is not None:
+            self.stats.reset()
+        refreshed = []
+        components = self._cad_data.components
+        pending_files = getattr(components, 'pending_files', ())  # lazy files are read fresh when accessed
+        for filename, parse_stage, fields in self._stages():
+            if filename in pending_files:
+                continue
+            state = _file_state(os.path.join(path, filename))
+            if state == self._file_states.get(filename):
+                continue
+            self._file_states[filename] = state
+            with self._measure(filename):
+                recorded = parse_stage(path, self._cad_data)
+            # components the file used to record but no longer does
+            if filename in self._file_components:
+                for comp in set(self._file_components[filename]).difference(recorded):
+                    for field in fields:
+                        components[comp].pop(field, None)
+                    if not components[comp]:
+                        del components[comp]
+            self._file_components[filename] = recorded
+            refreshed.append(filename)
+
+        if refreshed:
+            del self._cad_data.table
+            if self._cad_data._metrics is not None or self._cad_data._metrics_source is not None:
+                self._cad_data._defer_metrics(path, self._computed_metrics)
+            if use_cache:
+                self.cache.store(path, self._cad_data, fingerprint)
+        return refreshed
+
+    def read_metrics(self, cyphy2cad_output_dir=None):
+        """Join RequestedMetrics.xml to the computed metrics into ``cad_data.metrics``, a MetricIndex.
+
+        ``parse()`` leaves this to the first access of ``cad_data.metrics``, except for lazy readers:
+        joining needs every component. ComputedValues.xml is only read again if the components came from
+        a cache or a lazy parse has not read it yet.
+        """
+        if not cyphy2cad_output_dir:
+            cyphy2cad_output_dir = self._parsed_dir or self.cyphy2cad_output_dir
+        self._cad_data.metrics, self._computed_metrics = _join_metrics(self._cad_data, cyphy2cad_output_dir,
+                                                                       self._computed_metrics)
+        return self._cad_data.metrics
+
+    def _parse_interference_txt(self, path):
+        # the interference report is optional: CyPhy2CAD only writes it when interference was requested
+        filename = os.path.join(path, INTERFERENCE_FILE)
+        if os.path.isfile(filename):
+            with self._measure(INTERFERENCE_FILE) as stage:
+                self._cad_data.interference = read_interference_report(filename)
+                if stage is not None:
+                    stage.elements = len(self._cad_data.interference['pairs'])
+                    stage.bytes_read = os.path.getsize(filename)
+
+    def _parse_lazy_file(self, cad_data, path, filename):
+        # the reader only tracks the files of the data it parsed last, for refresh()
+        current = cad_data is self._cad_data
+        for stage_filename, parse_stage, fields in self._stages():
+            if stage_filename == filename:
+                if current:
+                    self._file_states[filename] = _file_state(os.path.join(path, filename))
+                with self._measure(filename):
+                    recorded = parse_stage(path, cad_data)
+                if current:
+                    self._file_components[filename] = recorded
+
+    @contextmanager
+    def _measure(self, name):
+        # time the block as stage ``name`` of self.stats, if instrumenting; yields its StageStats or None
+        if self.stats is None:
+            yield None
+            return
+        with self.stats.stage(name) as stage:
+            self._stage = stage
+            try:
+                yield stage
+            finally:
+                self._stage = None
+
+    def _read_xml(self, filename):
+        # ElementTree root of filename; when instrumenting, the running stage gets the read time, size and
+        # element count. The elements are counted while the tree is built: walking the tree again would add
+        # a third of the read time to the mining time
+        if self._stage is None:
+            return et.parse(filename).getroot()
+        start = time.time()
+        elements = 0
+        events = et.iterparse(filename, events=('start',))
+        for _ in events:
+            elements += 1
+        self._stage.xml_seconds = time.time() - start
+        self._stage.elements = elements
+        self._stage.bytes_read = os.path.getsize(filename)
+        return events.root
+
+    def _stages(self):
+        # (output file name, parse stage, fields it records), in parse order
+        return [
+            ("CADAssembly.xml", self._parse_cadassembly_xml, CADASSEMBLY_FIELDS),
+            ("CADAssembly_metrics.xml", self._parse_cadassembly_metrics_xml, CADASSEMBLY_METRICS_FIELDS),
+            ("ComputedValues.xml", self._parse_computed_values_xml, COMPUTED_VALUES_FIELDS)
+        ]
+
+    def iter_components(self, cyphy2cad_output_dir=None):
+        """Stream ``(component_id, component_data)`` records without building the XML trees.
+
+        The three files are read with iterparse and every element is dropped once it has been mined,
+        so peak memory is bounded by the per-component records rather than by the size of the files.
+        Records hold the same fields as ``CyPhy2CADData.components`` after ``parse()``, in the reader's
+        ``units`` if set.
+        """
+        if not cyphy2cad_output_dir:
+            cyphy2cad_output_dir = self.cyphy2cad_output_dir
+
+        comp_to_cad_data = {}  # ComponentID to CADAssembly.xml data
+        for cad_comp, parent in _iterparse(os.path.join(cyphy2cad_output_dir, "CADAssembly.xml"), ('CADComponent',),
+                                           with_parent=True):
+            component_data = _read_cad_component(cad_comp)
+            component_data['parent_component_id'] = _parent_component_id(parent)
+            component_data['constraints'] = _read_constraints(cad_comp) or None
+            comp_to_cad_data[cad_comp.get('ComponentID')] = component_data
+
+        comp_to_points = {}  # ComponentID to LinkPoints
+        for cad_comp in _iterparse(os.path.join(cyphy2cad_output_dir, "ComputedValues.xml"), ('Component',)):
+            comp = cad_comp.get('ComponentInstanceID')
+            metrics = read_computed_metrics(cad_comp)[0]
+            points = _link_points(metrics)
+            if len(points) > 0:
+                comp_to_points[comp] = points
+                if self.units is not None:
+                    _normalize_link_points({comp: points}, {comp: _link_point_units(metrics)}, self.units)
+
+        def make_record(comp, met, met_data, comp_to_pose):
+            component_data = comp_to_cad_data.pop(comp, {})
+            component_data.update(_metric_component_data(met, met_data, comp_to_pose.get(comp)))
+            if comp in comp_to_points:
+                component_data['points'] = comp_to_points.pop(comp)
+            return comp, component_data
 
-    def _parse_cadassembly_metrics_xml(self, path=""):
-        elem_tree = et.parse(os.path.join(path, "CADAssembly_metrics.xml"))
-        root_elem = elem_tree.getroot()
-        self._cad_data.cadassembly_metrics = root_elem
+        metric_to_comps = defaultdict(list)  # MetricID to ComponentIDs
+        metric_to_data = {}                  # MetricID to MetricComponent data waiting for the assembly poses
+        comp_to_pose = None                  # ComponentID to (Rotation, Translation) relative to the top assembly
+        assemblies_done = False
 
-        comp_to_metric = {}                          # ComponentID to MetricID
-        comp_to_rotation = {}                        # ComponentID to Rotation
-        comp_to_translation = {}                     # ComponentID to Translation
+        for elem in _iterparse(os.path.join(cyphy2cad_output_dir, "CADAssembly_metrics.xml"),
+                               ('Assemblies', 'CADComponent', 'MetricComponent')):
+            if elem.tag == 'CADComponent':
+                metric_to_comps[elem.get('MetricID')].append(elem.get('ComponentInstanceID'))
+                continue
+            if elem.tag == 'Assemblies':
+                assemblies_done = True
+                continue
 
-        metric_to_csys = {}                          # MetricID to CoordinateSystem
-        comp_to_cad_file_name_generated = {}         # MetricID to Generated CAD File Name
-        cadname_to_metric = {}                       # CAD Name to MetricID
+            arrays = _MetricArrays(1)
+            met, met_data, children = _read_metric_component(elem, arrays, 0)
+            if self.units is not None:
+                # the children poses are in the units of this MetricComponent, before it is converted
+                children = _normalize_metric_components(arrays, [met_data], children, met_data['units'], self.units)
+            metric_to_data[met] = met_data
+            if met == '1':
+                comp_to_pose = children
+            if comp_to_pose is None or not assemblies_done:
+                continue  # the top assembly poses or the component list are further down the file
 
-        metric_to_boundingbox_def_csys = {}          # MetricID to Bounding Box relative to CAD ASSEMBLY/PART Default CSYS
-        metric_to_cog_vector_def_csys = {}           # MetricID to C.O.G. relative to CAD ASSEMBLY/PART Default CSYS
-        metric_to_inertia_tensor_def_csys = {}       # MetricID to Inertia Tensor at CAD ASSEMBLY/PART Default CSYS
-        metric_to_inertia_tensor_cog = {}            # MetricID to Inertia Tensor at CAD ASSEMBLY/PART C.O.G.
-        metric_to_principle_moments_of_inertia = {}  # MetricID to Principle Moments of Inertia
+            for met, met_data in metric_to_data.items():
+                for comp in metric_to_comps.pop(met, ()):
+                    yield make_record(comp, met, met_data, comp_to_pose)
+            metric_to_data.clear()
 
-        metric_to_surfacearea = {}                   # MetricID to Surface Area
-        metric_to_volume = {}                        # MetricID to Volume
-        metric_to_mass = {}                          # MetricID to Mass
+        for met, met_data in metric_to_data.items():
+            for comp in metric_to_comps.pop(met, ()):
+                yield make_record(comp, met, met_data, comp_to_pose or {})
 
-        metric_to_units = {}                         # MetricID to Units
+        # components missing from CADAssembly_metrics.xml
+        for comp in set(comp_to_cad_data) | set(comp_to_points):
+            component_data = comp_to_cad_data.pop(comp, {})
+            if comp in comp_to_points:
+                component_data['points'] = comp_to_points.pop(comp)
+            yield comp, component_data
 
-        def extract_matrix(element, dim=None):
-            if not dim:
-                dim = [3,3]  # default is 3x3 matrix
-            matrix = [[0 for col in xrange(dim[1])] for row in xrange(dim[0])]
-            for row_index, row in enumerate(element.findall("./Rows/Row")):
-                for col_index, col in enumerate(row.findall('Column')):
-                    matrix[row_index][col_index] = float(col.get('Value'))
-            return matrix
+    def _parse_cadassembly_xml(self, path, cad_data):
+        root_elem = self._read_xml(os.path.join(path, "CADAssembly.xml"))
+        if self.keep_xml:
+            cad_data.cadassembly = root_elem
 
-        def extract_xyz_vector(element):
-            return [float(element.get("X")), float(element.get("Y")), float(element.get("Z"))]
+        comp_to_cad_data = {}     # ComponentID to CAD Component data
+        comp_to_constraints = {}  # ComponentID to CAD Assembly Constraint
 
-        def extract_xyz_point(element):
-            return extract_xyz_vector(element)
+        comp_to_parent = {}       # ComponentID to the ComponentID of the enclosing CADComponent
 
         # mine CAD component data
         for cad_comp in root_elem.iter('CADComponent'):
-            comp_to_metric[cad_comp.get('ComponentInstanceID')] = cad_comp.get('MetricID')
-
-        for child in root_elem.findall("./MetricComponents/MetricComponent[@MetricID='1']/Children/ChildMetric"):
-            comp = child.get('ComponentInstanceID')
-            comp_to_rotation[comp] = np.array(extract_matrix(child.find('RotationMatrix')))
-            comp_to_translation[comp] = np.array(extract_xyz_vector(child.find('Translation')))
-
-        for met_comp in root_elem.iter('MetricComponent'):
-            met = met_comp.get('MetricID')
-            metric_to_csys[met] = met_comp.get('CoordinateSystem')
-            comp_to_cad_file_name_generated[met] = met_comp.get('Name')
-            cadname_to_metric[met_comp.get('Name')] = met
-            bbox = met_comp.find('BoundingBox')
-            bbox_pts = []
-            for pt in bbox.findall('./OutlinePoints/Point'):
-                bbox_pts.append(extract_xyz_point(pt))
-            metric_to_boundingbox_def_csys[met] = {
-                'bounding_box': np.array(extract_xyz_vector(bbox)),
-                'outline_points': np.array(bbox_pts)
-            }
+            comp = cad_comp.get('ComponentID')
+            comp_to_cad_data[comp] = _read_cad_component(cad_comp)
+            for child in cad_comp.findall('CADComponent'):
+                comp_to_parent[child.get('ComponentID')] = comp
+            constraints = _read_constraints(cad_comp)
+            if len(constraints) > 0:
+                comp_to_constraints[comp] = constraints
 
-            cog = met_comp.find('CG')
-            if cog is not None:
-                metric_to_cog_vector_def_csys[met] = np.array(extract_xyz_point(cog))
-
-            inertia_def_csys = met_comp.find("./InertiaTensor[@At='DEFAULT_CSYS']")
-            if inertia_def_csys is not None:
-                metric_to_inertia_tensor_def_csys[met] = extract_matrix(inertia_def_csys)
-
-            inertia_cog = met_comp.find("./InertiaTensor[@At='CENTER_OF_GRAVITY']")
-            if inertia_cog is not None:
-                metric_to_inertia_tensor_cog[met] = extract_matrix(inertia_cog)
-
-            p_moments_inertia = met_comp.find('PrincipleMomentsOfInertia')
-            if p_moments_inertia is not None:
-                rotation_matrix = p_moments_inertia.find('RotationMatrix')
-                metric_to_principle_moments_of_inertia[met] = {
-                    'rotation_matrix': extract_matrix(rotation_matrix),
-                    'principle_moments': extract_matrix(p_moments_inertia, dim=[3,1])
-                }
-
-            def get_scalar(metric_component, name):
-                scalar = metric_component.find("./Scalars/Scalar[@Name='{}']".format(name))
-                if scalar is not None:
-                    return float(scalar.get('Value'))
-                else:
-                    return None
-
-            metric_to_surfacearea[met] = get_scalar(met_comp, 'SurfaceArea')
-            metric_to_volume[met] = get_scalar(met_comp, 'Volume')
-            metric_to_mass[met] = get_scalar(met_comp, 'Mass')
-
-            units = met_comp.find('Units')
-            metric_to_units[met] = {
-                'distance': units.get('Distance'),
-                'force': units.get('Force'),
-                'mass': units.get('Mass'),
-                'temperature': units.get('Temperature'),
-                'time': units.get('Time')
-            }
+        # record CAD component data
+        for comp, component_data in comp_to_cad_data.items():  # FIXME: items() instead of iteritems() for Python3 compatibility
+            component_data['parent_component_id'] = comp_to_parent.get(comp)
+            component_data['constraints'] = comp_to_constraints.get(comp, None)
+            cad_data.components[comp].update(component_data)
+
+        return list(comp_to_cad_data.keys())
+
+    def _parse_cadassembly_metrics_xml(self, path, cad_data):
+        root_elem = self._read_xml(os.path.join(path, "CADAssembly_metrics.xml"))
+        if self.keep_xml:
+            cad_data.cadassembly_metrics = root_elem
+
+        comp_to_metric = {}   # ComponentID to MetricID
+        comp_to_pose = {}     # ComponentID to (Rotation, Translation) relative to the top assembly
+        metric_to_data = {}   # MetricID to mined MetricComponent data
+
+        # mine CAD component data
+        for assembly in root_elem.findall('./Assemblies/Assembly'):
+            for cad_comp in assembly.iter('CADComponent'):
+                comp_to_metric[cad_comp.get('ComponentInstanceID')] = cad_comp.get('MetricID')
+
+        met_comps = root_elem.findall('./MetricComponents/MetricComponent')
+        arrays = _MetricArrays(len(met_comps))
+        row_data = []  # mined data of each row of arrays
+        for row, met_comp in enumerate(met_comps):
+            met, met_data, children = _read_metric_component(met_comp, arrays, row)
+            metric_to_data[met] = met_data
+            row_data.append(met_data)
+            if met == '1':
+                comp_to_pose = children
+        if self.units is not None:
+            top_units = metric_to_data['1']['units'] if '1' in metric_to_data else None
+            comp_to_pose = _normalize_metric_components(arrays, row_data, comp_to_pose, top_units, self.units)
 
         # record CAD component data
         for comp, met in comp_to_metric.items():  # FIXME: items() instead of iteritems() for Python3 compatibility
-            component_data = {
-                'metric_id': met,
-                'rotation': comp_to_rotation.get(comp, None),
-                'translation': comp_to_translation.get(comp, None),
-                'coordinate_system': metric_to_csys[met],
-                'cad_filename_generated': comp_to_cad_file_name_generated[met],
-                'bounding_box': metric_to_boundingbox_def_csys[met],
-                'center_of_gravity': metric_to_cog_vector_def_csys.get(met, None),
-                'inertia': {
-                    'inertia_tensor_at_default_csys': metric_to_inertia_tensor_def_csys.get(met, None),
-                    'inertia_tensor_at_center_of_gravity': metric_to_inertia_tensor_cog.get(met, None),
-                    'principle_moments_of_inertia': metric_to_principle_moments_of_inertia.get(met, None)
-                },
-                'surface_area': metric_to_surfacearea[met],
-                'volume': metric_to_volume[met],
-                'mass': metric_to_mass[met],
-                'units': metric_to_units[met]
-            }
-            self._cad_data.components[comp].update(component_data)
+            component_data = _metric_component_data(met, metric_to_data[met], comp_to_pose.get(comp))
+            cad_data.components[comp].update(component_data)
 
-    def _parse_computed_values_xml(self, path):
-        elem_tree = et.parse(os.path.join(path, "ComputedValues.xml"))
-        root_elem = elem_tree.getroot()
-        self._cad_data.computed_values = root_elem
+        return list(comp_to_metric.keys())
+
+    def _parse_computed_values_xml(self, path, cad_data):
+        root_elem = self._read_xml(os.path.join(path, "ComputedValues.xml"))
+        if self.keep_xml:
+            cad_data.computed_values = root_elem
 
         comp_to_points = {}  # ComponentID to LinkPoints
+        comp_to_point_units = {}  # ComponentID to the distance unit of each LinkPoint
+        computed_metrics = [], []  # every Metric and ComplexMetric, for read_metrics()
 
         # mine CAD component data
         for cad_comp in root_elem.iter('Component'):
             comp = cad_comp.get('ComponentInstanceID')
-            points = {}
-            for metric in cad_comp.iter('Metric'):
-                if ":" in metric.get('MetricID') and metric.get('ArrayValue') is not None:
-                    pt_name = metric.get('MetricID').split(":")[-1]
-                    pt_arrayvalue = [float(x) for x in metric.get('ArrayValue').split(";")]
-                    points[pt_name] = np.array(pt_arrayvalue)
+            metrics, complex_metrics = read_computed_metrics(cad_comp)
+            computed_metrics[0].extend(metrics)
+            computed_metrics[1].extend(complex_metrics)
+            points = _link_points(metrics)
             if len(points.keys()) > 0:
                 comp_to_points[comp] = points
+                comp_to_point_units[comp] = _link_point_units(metrics)
+        if cad_data is self._cad_data:
+            self._computed_metrics = computed_metrics
+        if self.units is not None:
+            _normalize_link_points(comp_to_points, comp_to_point_units, self.units)
 
         # record CAD component data
         for comp, v in comp_to_points.items():  # FIXME: items() instead of iteritems() for Python3 compatibility
             component_data = {
                 'points': comp_to_points[comp]
             }
-            self._cad_data.components[comp].update(component_data)
+            cad_data.components[comp].update(component_data)
+
+        return list(comp_to_points.keys())
+
+
+def _loading_all(method):
+    def load_and_call(self, *args, **kwargs):
+        self._load()
+        return method(self, *args, **kwargs)
+    return load_and_call
+
+
+def _loading_key(method):
+    def load_and_call(self, key, *args):
+        self._load(key)
+        return method(self, key, *args)
+    return load_and_call
+
+
+class _LazyComponents(dict):
+    """``CyPhy2CADData.components`` of a lazy reader: ComponentID to ``_LazyComponent``.
+
+    Like the defaultdict it replaces, looking up an unknown ComponentID adds an empty component. Listing
+    the components (keys, items, len, ``in``, ...) parses every output file that has not been parsed yet.
+    """
+    def __init__(self, field_files, parse_file):
+        dict.__init__(self)
+        self._field_files = field_files              # component field to the output file recording it
+        self._parse_file = parse_file
+        self.pending_files = set(field_files.values())  # output files not parsed yet
+
+    def load_field(self, field):
+        """Parse the output file recording ``field`` if it has not been parsed yet."""
+        filename = self._field_files.get(field)
+        if filename in self.pending_files:
+            self._parse_file(filename)
+            self.pending_files.discard(filename)
+            return True
+        return False
+
+    def _load(self, comp=None):
+        for filename in CYPHY2CAD_OUTPUT_FILES:
+            if filename in self.pending_files:
+                self._parse_file(filename)
+                self.pending_files.discard(filename)
+
+    def __missing__(self, comp):
+        component = _LazyComponent(self)
+        dict.__setitem__(self, comp, component)
+        return component
+
+    __contains__ = _loading_key(dict.__contains__)
+    get = _loading_key(dict.get)
+    has_key = _loading_key(dict.has_key)
+    pop = _loading_key(dict.pop)
+    keys = _loading_all(dict.keys)
+    values = _loading_all(dict.values)
+    items = _loading_all(dict.items)
+    iterkeys = _loading_all(dict.iterkeys)
+    itervalues = _loading_all(dict.itervalues)
+    iteritems = _loading_all(dict.iteritems)
+    __iter__ = _loading_all(dict.__iter__)
+    __len__ = _loading_all(dict.__len__)
+    __eq__ = _loading_all(dict.__eq__)
+    __ne__ = _loading_all(dict.__ne__)
+    __repr__ = _loading_all(dict.__repr__)
+    copy = _loading_all(dict.copy)
+
+
+class _LazyComponent(dict):
+    """Component data that parses the output file recording a field the first time the field is needed."""
+    def __init__(self, components):
+        dict.__init__(self)
+        self._components = components
+
+    def _load(self, field=None):
+        if field is None:
+            self._components._load()
+        else:
+            self._components.load_field(field)
+
+    def __missing__(self, field):
+        if self._components.load_field(field) and dict.__contains__(self, field):
+            return dict.__getitem__(self, field)
+        raise KeyError(field)
+
+    __contains__ = _loading_key(dict.__contains__)
+    get = _loading_key(dict.get)
+    has_key = _loading_key(dict.has_key)
+    pop = _loading_key(dict.pop)
+    keys = _loading_all(dict.keys)
+    values = _loading_all(dict.values)
+    items = _loading_all(dict.items)
+    iterkeys = _loading_all(dict.iterkeys)
+    itervalues = _loading_all(dict.itervalues)
+    iteritems = _loading_all(dict.iteritems)
+    __iter__ = _loading_all(dict.__iter__)
+    __len__ = _loading_all(dict.__len__)
+    __eq__ = _loading_all(dict.__eq__)
+    __ne__ = _loading_all(dict.__ne__)
+    __repr__ = _loading_all(dict.__repr__)
+    copy = _loading_all(dict.copy)
+
+
+def _join_metrics(cad_data, cyphy2cad_output_dir, computed_metrics):
+    # (MetricIndex, computed metrics) of cad_data; computed_metrics, the (metrics, complex metrics) mined from
+    # ComputedValues.xml, are streamed from the file again if None. Only the files actually read are
+    # measured, each as its own stage
+    requested = []
+    requested_xml = os.path.join(cyphy2cad_output_dir, REQUESTED_METRICS_FILE)
+    if os.path.isfile(requested_xml):
+        with _stats_stage(cad_data.stats, REQUESTED_METRICS_FILE) as stage:
+            requested = [read_requested_metric(metric) for metric in _iterparse(requested_xml, ('Metric',))]
+            if stage is not None:
+                stage.elements = len(requested)
+                stage.bytes_read = os.path.getsize(requested_xml)
+
+    if computed_metrics is None:
+        computed_metrics = [], []
+        computed_xml = os.path.join(cyphy2cad_output_dir, "ComputedValues.xml")
+        if os.path.isfile(computed_xml):
+            with _stats_stage(cad_data.stats, "ComputedValues.xml") as stage:
+                components = 0
+                for component in _iterparse(computed_xml, ('Component',)):
+                    metrics, complex_metrics = read_computed_metrics(component)
+                    computed_metrics[0].extend(metrics)
+                    computed_metrics[1].extend(complex_metrics)
+                    components += 1
+                if stage is not None:
+                    stage.elements = components
+                    stage.bytes_read = os.path.getsize(computed_xml)
+
+    computed, complex_metrics = computed_metrics
+    metric_index = MetricIndex(requested, computed, complex_metrics, cad_data.components, cad_data.interference)
+    return metric_index, computed_metrics
+
+
+@contextmanager
+def _stats_stage(stats, name):
+    # stats.stage(name), or a StageStats of None if stats is None
+    if stats is None:
+        yield None
+        return
+    with stats.stage(name) as stage:
+        yield stage
+
+
+def _recorded_components(components, fields):
+    # ComponentIDs of the components holding any of fields
+    return [comp for comp, component_data in components.items()
+            if any(field in component_data for field in fields)]
+
+
+def _file_state(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime
+
+
+def _iterparse(filename, tags, with_parent=False):
+    """Yield each completed element of ``filename`` whose tag is in ``tags``.
+
+    Elements are detached from their parent once they have been yielded (or, outside of a yielded
+    element, once they end), so the tree never grows beyond the element being mined. With
+    ``with_parent``, ``(element, parent element or None)`` pairs are yielded; the parent has not ended yet,
+    so only its tag and attributes are complete.
+    """
+    parents = []
+    open_tags = 0  # number of enclosing elements that will be yielded
+    for event, elem in et.iterparse(filename, events=('start', 'end')):
+        if event == 'start':
+            parents.append(elem)
+            if elem.tag in tags:
+                open_tags += 1
+            continue
+
+        parents.pop()
+        if elem.tag in tags:
+            open_tags -= 1
+            yield (elem, parents[-1] if parents else None) if with_parent else elem
+        elif open_tags > 0:
+            continue  # still needed by the enclosing element
+        if parents:
+            parents[-1].remove(elem)
+
+
+def _read_cad_component(cad_comp):
+    return {
+        'component_name': cad_comp.get('DisplayName'),
+        'cad_filename_original': cad_comp.get('Name'),
+        'cad_type': cad_comp.get('Type')
+    }
+
+
+def _parent_component_id(parent):
+    # ComponentID of the CADComponent enclosing a CADComponent, None for the top assembly
+    if parent is None or parent.tag != 'CADComponent':
+        return None
+    return parent.get('ComponentID')
+
+
+def _read_constraints(cad_comp):
+    # one list of Pairs per Constraint of the component
+    constraints = []
+    for constraint in cad_comp.findall('Constraint'):
+        pairs = []
+        for pair in constraint.findall('Pair'):
+            pairs.append({
+                'feature_interface_type': pair.get('FeatureInterfaceType'),
+                'feature_geometry_type': pair.get('FeatureGeometryType'),
+                'feature_alignment_type': pair.get('FeatureAlignmentType'),
+                'constraint_features': [{
+                    'component_id': feature.get('ComponentID'),
+                    'feature_name': feature.get('FeatureName'),
+                    'feature_orientation_type': feature.get('FeatureOrientationType')
+                } for feature in pair.findall('ConstraintFeature')]
+            })
+        constraints.append(pairs)
+    return constraints
+
+
+def _link_points(metrics):
+    # the <ComponentInstanceID>:<point name> metrics of a component
+    points = {}
+    for metric in metrics:
+        if ":" in metric['metric_id'] and metric['value'] is not None:
+            points[metric['metric_id'].split(":")[-1]] = np.atleast_1d(metric['value'])
+    return points
+
+
+def _link_point_units(metrics):
+    # the Units of each of the _link_points of a component
+    return {metric['metric_id'].split(":")[-1]: metric['units'] for metric in metrics
+            if ":" in metric['metric_id'] and metric['value'] is not None}
+
+
+def _normalize_link_points(comp_to_points, comp_to_point_units, target):
+    # convert the link points to the target distance unit with one multiply per unit and point size; the
+    # points are replaced rather than scaled in place, as the ComputedValues metrics still hold them
+    members = [(comp, name) for comp, points in comp_to_points.items() for name in points]
+    keys = [(comp_to_point_units[comp][name], len(comp_to_points[comp][name])) for comp, name in members]
+    for (units, size), rows in group_by_units(keys).items():
+        distance, _ = unit_factors({'distance': units}, target)
+        if distance == 1.0:
+            continue
+        scaled = np.array([comp_to_points[members[row][0]][members[row][1]] for row in rows]) * distance
+        for scaled_row, row in enumerate(rows):
+            comp, name = members[row]
+            comp_to_points[comp][name] = scaled[scaled_row]
+
+
+def _normalize_metric_components(arrays, row_data, comp_to_pose, pose_units, target):
+    """Convert mined MetricComponents to the ``target`` units, in place.
+
+    Rows of ``arrays`` sharing their units are scaled with one multiply per field. The poses of the top
+    assembly's children are in its units (``pose_units``); returns them converted.
+    """
+    for units_key, rows in group_by_units([tuple(sorted((met_data['units'] or {}).items()))
+                                           for met_data in row_data]).items():
+        units = dict(units_key)
+        distance, mass = unit_factors(units, target)
+        if distance == 1.0 and mass == 1.0:
+            continue
+        inertia = mass * distance ** 2
+        arrays.bounding_box[rows] *= distance
+        arrays.outline_points[rows] *= distance
+        arrays.center_of_gravity[rows] *= distance
+        arrays.inertia_tensor_at_default_csys[rows] *= inertia
+        arrays.inertia_tensor_at_center_of_gravity[rows] *= inertia
+        arrays.principle_moments[rows] *= inertia
+        for row in rows:
+            met_data = row_data[row]
+            bounding_box = met_data['bounding_box']
+            if bounding_box is not None and bounding_box['outline_points'].shape != arrays.outline_points.shape[1:]:
+                bounding_box['outline_points'] *= distance  # not a view into arrays
+            for field, factor in (('surface_area', distance ** 2), ('volume', distance ** 3), ('mass', mass)):
+                if met_data[field] is not None:
+                    met_data[field] *= factor
+            met_data['units'] = converted_units(units, target)
+
+    distance, _ = unit_factors(pose_units, target)
+    if distance == 1.0 or not comp_to_pose:
+        return comp_to_pose
+    comps = list(comp_to_pose.keys())
+    translations = np.array([comp_to_pose[comp][1] for comp in comps]) * distance
+    return {comp: (comp_to_pose[comp][0], translations[index]) for index, comp in enumerate(comps)}
+
+
+def _metric_component_data(met, met_data, pose):
+    # per-component copy of the (possibly shared) MetricComponent data
+    rotation, translation = pose if pose is not None else (None, None)
+    component_data = dict(met_data)
+    component_data['inertia'] = dict(met_data['inertia'])
+    component_data['metric_id'] = met
+    component_data['rotation'] = rotation
+    component_data['translation'] = translation
+    return component_data
+
+
+_SCALARS = {
+    'SurfaceArea': 'surface_area',
+    'Volume': 'volume',
+    'Mass': 'mass'
+}
+
+
+class _MetricArrays(object):
+    """Preallocated float storage for the numeric fields of ``size`` MetricComponents.
+
+    Each mined MetricComponent gets a row; the arrays handed out to the component
+    data are views into these blocks, so no per-value lists are built.
+    """
+    def __init__(self, size):
+        self.bounding_box = np.zeros((size, 3))
+        self.outline_points = np.zeros((size, 2, 3))
+        self.center_of_gravity = np.zeros((size, 3))
+        self.inertia_tensor_at_default_csys = np.zeros((size, 3, 3))
+        self.inertia_tensor_at_center_of_gravity = np.zeros((size, 3, 3))
+        self.principle_rotation_matrix = np.zeros((size, 3, 3))
+        self.principle_moments = np.zeros((size, 3, 1))
+
+
+def _read_rows(element, out):
+    # element holds <Rows><Row><Column Value=""/>...</Row>...</Rows>
+    rows = element.find('Rows')
+    if rows is None:
+        return out
+    for row_index, row in enumerate(rows):
+        for col_index, col in enumerate(row):
+            out[row_index, col_index] = float(col.get('Value'))
+    return out
+
+
+def _read_xyz(element, out):
+    out[0] = float(element.get('X'))
+    out[1] = float(element.get('Y'))
+    out[2] = float(element.get('Z'))
+    return out
+
+
+def _read_metric_component(met_comp, arrays, row):
+    """Mine one MetricComponent element in a single pass over its children.
+
+    Returns ``(metric_id, metric_data, children)`` where ``children`` maps the
+    ComponentInstanceID of each ChildMetric to its ``(rotation, translation)``.
+    """
+    met = met_comp.get('MetricID')
+    bounding_box = None
+    center_of_gravity = None
+    inertia_def_csys = None
+    inertia_cog = None
+    p_moments_inertia = None
+    scalars = {'surface_area': None, 'volume': None, 'mass': None}
+    units = None
+    children = {}
+
+    for child in met_comp:
+        tag = child.tag
+        if tag == 'BoundingBox':
+            outline_points = [pt for pts in child if pts.tag == 'OutlinePoints' for pt in pts]
+            if len(outline_points) == arrays.outline_points.shape[1]:
+                outline = arrays.outline_points[row]
+            else:
+                outline = np.zeros((len(outline_points), 3))
+            for pt_index, pt in enumerate(outline_points):
+                _read_xyz(pt, outline[pt_index])
+            bounding_box = {
+                'bounding_box': _read_xyz(child, arrays.bounding_box[row]),
+                'outline_points': outline
+            }
+        elif tag == 'CG':
+            center_of_gravity = _read_xyz(child, arrays.center_of_gravity[row])
+        elif tag == 'InertiaTensor':
+            at = child.get('At')
+            if at == 'DEFAULT_CSYS':
+                inertia_def_csys = _read_rows(child, arrays.inertia_tensor_at_default_csys[row])
+            elif at == 'CENTER_OF_GRAVITY':
+                inertia_cog = _read_rows(child, arrays.inertia_tensor_at_center_of_gravity[row])
+        elif tag == 'PrincipleMomentsOfInertia':
+            rotation_matrix = arrays.principle_rotation_matrix[row]
+            rotation_elem = child.find('RotationMatrix')
+            if rotation_elem is not None:
+                _read_rows(rotation_elem, rotation_matrix)
+            p_moments_inertia = {
+                'rotation_matrix': rotation_matrix,
+                'principle_moments': _read_rows(child, arrays.principle_moments[row])
+            }
+        elif tag == 'Scalars':
+            for scalar in child:
+                name = _SCALARS.get(scalar.get('Name'))
+                if name is not None:
+                    scalars[name] = float(scalar.get('Value'))
+        elif tag == 'Units':
+            units = {
+                'distance': child.get('Distance'),
+                'force': child.get('Force'),
+                'mass': child.get('Mass'),
+                'temperature': child.get('Temperature'),
+                'time': child.get('Time')
+            }
+        elif tag == 'Children':
+            child_metrics = [c for c in child if c.tag == 'ChildMetric']
+            rotations = np.zeros((len(child_metrics), 3, 3))
+            translations = np.zeros((len(child_metrics), 3))
+            for child_index, child_metric in enumerate(child_metrics):
+                for pose in child_metric:
+                    if pose.tag == 'RotationMatrix':
+                        _read_rows(pose, rotations[child_index])
+                    elif pose.tag == 'Translation':
+                        _read_xyz(pose, translations[child_index])
+                children[child_metric.get('ComponentInstanceID')] = (rotations[child_index],
+                                                                     translations[child_index])
+
+    met_data = {
+        'coordinate_system': met_comp.get('CoordinateSystem'),
+        'cad_filename_generated': met_comp.get('Name'),
+        'bounding_box': bounding_box,
+        'center_of_gravity': center_of_gravity,
+        'inertia': {
+            'inertia_tensor_at_default_csys': inertia_def_csys,
+            'inertia_tensor_at_center_of_gravity': inertia_cog,
+            'principle_moments_of_inertia': p_moments_inertia
+        },
+        'surface_area': scalars['surface_area'],
+        'volume': scalars['volume'],
+        'mass': scalars['mass'],
+        'units': units
+    }
+    return met, met_data, children
 
 
 class CyPhy2CADData(object):
@@ -231,16 +843,58 @@ class CyPhy2CADData(object):
         self._cadassembly_metrics = None
         self._computed_values = None
 
+        self._interference = None  # CADAssembly_interference.txt report, if there is one
+        self._metrics = None       # MetricIndex of the requested and computed metrics
+        self._metrics_source = None  # (output directory, computed metrics or None) to join them from on access
+        self.stats = None          # ReaderStats of the instrumented reader that parsed the data, if any
+
         self._data = {}
         self._cad_components = defaultdict(dict)
+        self._table = None
+        self._world_frame = None
+        self._link_point_index = None
+        self._constraint_graph = None
 
     def dump(self):
-        json_str = json.dumps(self.data, indent=4, separators=(',', ': '), sort_keys=True, cls=NumpyEncoder)
-        return json_reformat_lists(json_str)
+        if self.stats is None:
+            return json_dumps_reformatted(self.data)
+        with self.stats.stage('dump') as stage:
+            json_str = json_dumps_reformatted(self.data)
+            stage.elements = len(self._cad_components)
+            stage.bytes_written = len(json_str)
+        return json_str
 
     def write(self, filename):
-        with open(filename, 'w') as f_out:
-            f_out.write(self.dump())
+        if self.stats is None:
+            with open(filename, 'w') as f_out:
+                json_dump_reformatted(self.data, f_out)
+            return
+        with self.stats.stage('write') as stage:
+            with open(filename, 'w') as f_out:
+                json_dump_reformatted(self.data, f_out)
+                stage.bytes_written = f_out.tell()
+            stage.elements = len(self._cad_components)
+
+    @classmethod
+    def load(cls, filename):
+        """Read back the JSON written by ``write()``.
+
+        The components come back as after ``parse()``: poses, CGs, bounding boxes, inertia tensors and link
+        points are float arrays, rebuilt while the file is scanned (see ``json_load_arrays``).
+        """
+        with open(filename) as f_in:
+            return cls._from_data(json_load_arrays(f_in))
+
+    @classmethod
+    def loads(cls, json_str):
+        """Read back the JSON returned by ``dump()``."""
+        return cls._from_data(json_loads_arrays(json_str))
+
+    @classmethod
+    def _from_data(cls, data):
+        cad_data = cls()
+        cad_data.components.update(data['components'])
+        return cad_data
 
     @property
     def cadassembly(self):
@@ -278,6 +932,43 @@ class CyPhy2CADData(object):
     def computed_values(self):
         self._computed_values = None
 
+    @property
+    def interference(self):
+        return self._interference
+
+    @interference.setter
+    def interference(self, interference_report):
+        self._interference = interference_report
+
+    @interference.deleter
+    def interference(self):
+        self._interference = None
+
+    @property
+    def metrics(self):
+        # joined on first access after a parse, so a caller that never looks at the metrics does not pay for
+        # the join (or for reading ComputedValues.xml again after a cache hit)
+        if self._metrics is None and self._metrics_source is not None:
+            cyphy2cad_output_dir, computed_metrics = self._metrics_source
+            self._metrics_source = None
+            self._metrics = _join_metrics(self, cyphy2cad_output_dir, computed_metrics)[0]
+        return self._metrics
+
+    @metrics.setter
+    def metrics(self, metric_index):
+        self._metrics = metric_index
+        self._metrics_source = None
+
+    @metrics.deleter
+    def metrics(self):
+        self._metrics = None
+        self._metrics_source = None
+
+    def _defer_metrics(self, cyphy2cad_output_dir, computed_metrics):
+        # join RequestedMetrics.xml in cyphy2cad_output_dir to computed_metrics when metrics is next accessed
+        self._metrics = None
+        self._metrics_source = cyphy2cad_output_dir, computed_metrics
+
     @property
     def components(self):
         return self._cad_components
@@ -285,10 +976,53 @@ class CyPhy2CADData(object):
     @components.setter
     def components(self, components):
         self._cad_components = components
+        self._table = None
+        self._world_frame = None
+        self._link_point_index = None
+        self._constraint_graph = None
 
     @components.deleter
     def components(self):
         self._cad_components = None
+        self._table = None
+        self._world_frame = None
+        self._link_point_index = None
+        self._constraint_graph = None
+
+    @property
+    def table(self):
+        # columnar snapshot of the components, built on first use; del the table after editing the components
+        if self._table is None:
+            self._table = ComponentTable.from_components(self._cad_components)
+        return self._table
+
+    @table.deleter
+    def table(self):
+        self._table = None
+        self._world_frame = None
+        self._link_point_index = None
+        self._constraint_graph = None
+
+    @property
+    def world_frame(self):
+        # geometry in the top-assembly frame, built from the table; deleting the table drops it too
+        if self._world_frame is None:
+            self._world_frame = WorldFrame.from_components(self._cad_components, self.table)
+        return self._world_frame
+
+    @property
+    def link_point_index(self):
+        # KD-tree over the world-frame link points, built on first use; deleting the table drops it too
+        if self._link_point_index is None:
+            self._link_point_index = LinkPointIndex.from_world_frame(self.world_frame)
+        return self._link_point_index
+
+    @property
+    def constraint_graph(self):
+        # graph of the CADAssembly.xml constraints, built on first use; deleting the table drops it too
+        if self._constraint_graph is None:
+            self._constraint_graph = ConstraintGraph.from_components(self._cad_components)
+        return self._constraint_graph
 
     @property
     def data(self):
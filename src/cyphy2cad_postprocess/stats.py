@@ -0,0 +1,114 @@
+import sys
+import time
+from contextlib import contextmanager
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class StageStats(object):
+    """Measurements of one stage of a parse or of a serialization.
+
+    ``seconds`` is the wall time of the whole stage and ``xml_seconds`` the part of it spent reading the
+    file into an ElementTree, counting its elements on the way (None for stages that stream or do not read
+    XML); the rest is mining. ``elements`` counts the XML elements read (only the mined ones for a stage that
+    streams, the components written for serialization), ``bytes_read``
+    and ``bytes_written`` the file bytes. Python 2 has no tracemalloc, so memory is the process resident
+    set high-water mark from ``resource.getrusage``: ``peak_rss`` after the stage and
+    ``peak_rss_increase``, how much the stage raised it, both in bytes (None where ``resource`` is
+    unavailable). A stage that stays below an earlier peak shows no increase.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.seconds = None
+        self.xml_seconds = None
+        self.elements = None
+        self.bytes_read = None
+        self.bytes_written = None
+        self.peak_rss = None
+        self.peak_rss_increase = None
+
+    @property
+    def mining_seconds(self):
+        if self.seconds is None or self.xml_seconds is None:
+            return None
+        return self.seconds - self.xml_seconds
+
+    def as_dict(self):
+        return {
+            'name': self.name,
+            'seconds': self.seconds,
+            'xml_seconds': self.xml_seconds,
+            'mining_seconds': self.mining_seconds,
+            'elements': self.elements,
+            'bytes_read': self.bytes_read,
+            'bytes_written': self.bytes_written,
+            'peak_rss': self.peak_rss,
+            'peak_rss_increase': self.peak_rss_increase
+        }
+
+    def __repr__(self):
+        return '<StageStats {} {:.3f} s>'.format(self.name, self.seconds or 0.0)
+
+
+class ReaderStats(object):
+    """StageStats of the last ``parse()`` or ``refresh()`` of a CyPhy2CADReader, and of later serializations.
+
+    Stages are kept in the order they finished; ``stats[name]`` is the latest stage of that name (the
+    output file name for a parse stage, ``dump`` or ``write`` for serialization). ``hook``, if given, is
+    called with every StageStats as soon as its stage finishes, e.g. to forward ``stage.as_dict()`` to a
+    metrics pipeline.
+    """
+    def __init__(self, hook=None):
+        self.hook = hook
+        self.stages = []
+
+    def reset(self):
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name):
+        """Measure the body of the ``with`` block as stage ``name``; the block fills in the counts."""
+        stage = StageStats(name)
+        peak_before = peak_rss()
+        start = time.time()
+        yield stage
+        stage.seconds = time.time() - start
+        stage.peak_rss = peak_rss()
+        if stage.peak_rss is not None:
+            stage.peak_rss_increase = stage.peak_rss - peak_before
+        self.stages.append(stage)
+        if self.hook is not None:
+            self.hook(stage)
+
+    def __getitem__(self, name):
+        for stage in reversed(self.stages):
+            if stage.name == name:
+                return stage
+        raise KeyError(name)
+
+    def __contains__(self, name):
+        return any(stage.name == name for stage in self.stages)
+
+    def __iter__(self):
+        return iter(self.stages)
+
+    def __len__(self):
+        return len(self.stages)
+
+    @property
+    def total_seconds(self):
+        return sum(stage.seconds for stage in self.stages)
+
+    def as_dicts(self):
+        return [stage.as_dict() for stage in self.stages]
+
+
+def peak_rss():
+    """High-water mark of the resident set size of this process in bytes, or None without ``resource``."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
@@ -0,0 +1,376 @@
+import os
+import uuid
+import random
+
+import numpy as np
+
+from mass_properties import roll_up
+from world_frame import compose_poses, transform_points, _box_corners
+
+
+_XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8" standalone="no" ?>\n'
+_UNITS = 'Distance="millimeter" Force="kg mm/sec2" Mass="kilogram" Temperature="centigrade" Time="second"'
+_DENSITY = 2.7e-6  # kg/mm3, so the masses and volumes agree
+
+
+class SyntheticAssembly(object):
+    """A random assembly tree of ``n_components`` components, at most ``depth`` levels below the top.
+
+    Row 0 is the top assembly; every other row ``i`` is a child of row ``parent[i]``, posed by
+    ``rotation[i]`` and ``translation[i]`` in its parent's frame. Components with children are
+    assemblies, the others parts. Parts are drawn from ``part_types`` part definitions (every part is
+    its own definition if None), each a box of random size and mass; every assembly is its own
+    definition and holds the mass properties and bounding box of its children, rolled up level by
+    level, so the written files are consistent with each other. Each non-top component has
+    ``link_points`` link points and is constrained to its previous sibling (to its parent if it is the
+    first child), and to the sibling before that when there is one, which closes constraint loops.
+
+    The arrays are per definition (``metric_rows`` maps each row to one):
+
+    ====================  ===========  ====================================================
+    mass, volume,         (D,)
+    surface_area
+    center_of_gravity     (D, 3)       in the definition's frame
+    inertia               (D, 3, 3)    inertia tensor at the center of gravity
+    outline_points        (D, 2, 3)    bounding box corners
+    ====================  ===========  ====================================================
+    """
+    def __init__(self, n_components, depth=1, part_types=None, link_points=4, seed=0):
+        if n_components < 1:
+            raise ValueError("An assembly has at least one component")
+        if depth < 1:
+            raise ValueError("The depth of an assembly is at least 1")
+        rng = np.random.RandomState(seed)
+        id_rng = random.Random(seed)
+        size = n_components
+
+        # complete tree with the smallest branching that fits every row within depth levels
+        branching = max(1, size - 1)
+        if depth > 1 and size > 2:
+            branching = 2
+            while sum(branching ** level for level in range(1, depth + 1)) < size - 1:
+                branching += 1
+        self.parent = np.full(size, -1, dtype=np.intp)
+        self.parent[1:] = (np.arange(1, size) - 1) // branching
+        self.level = np.zeros(size, dtype=np.intp)
+        for row in range(1, size):
+            self.level[row] = self.level[self.parent[row]] + 1
+        has_children = np.zeros(size, dtype=bool)
+        has_children[self.parent[1:]] = True
+        has_children[0] = True
+        self.cad_type = np.where(has_children, 'ASSEMBLY', 'PART')
+
+        top_id = str(uuid.UUID(int=id_rng.getrandbits(128)))
+        self.component_ids = ['{' + top_id + '}|1'] + \
+            [str(uuid.UUID(int=id_rng.getrandbits(128))) for _ in range(size - 1)]
+        self.configuration_id = self.component_ids[0]
+
+        # definitions: every assembly, then the part types
+        assemblies = np.flatnonzero(has_children)
+        parts = np.flatnonzero(~has_children)
+        n_types = len(parts) if part_types is None else max(1, min(part_types, len(parts)))
+        self.metric_rows = np.empty(size, dtype=np.intp)
+        self.metric_rows[assemblies] = np.arange(len(assemblies))
+        if part_types is None:
+            self.metric_rows[parts] = len(assemblies) + np.arange(len(parts))
+        else:
+            self.metric_rows[parts] = len(assemblies) + rng.randint(0, n_types, len(parts))
+        self.metric_ids = [str(row + 1) for row in range(len(assemblies) + n_types)]
+        self.names = ['SYN_ASM_{}'.format(row) for row in assemblies] + \
+            ['SYN_PART_{}'.format(part_type) for part_type in range(n_types)]
+        n_definitions = len(self.metric_ids)
+
+        # parts: boxes of uniform density, CG near the middle, axes at random
+        dims = rng.uniform(10.0, 200.0, (n_types, 3))
+        lower = -dims * rng.uniform(0.0, 1.0, (n_types, 3))
+        self.mass = np.zeros(n_definitions)
+        self.volume = np.zeros(n_definitions)
+        self.surface_area = np.zeros(n_definitions)
+        self.center_of_gravity = np.zeros((n_definitions, 3))
+        self.inertia = np.zeros((n_definitions, 3, 3))
+        self.outline_points = np.zeros((n_definitions, 2, 3))
+
+        part_defs = slice(len(assemblies), n_definitions)
+        fill = rng.uniform(0.2, 1.0, n_types)
+        self.volume[part_defs] = dims.prod(axis=1) * fill
+        self.surface_area[part_defs] = 2.0 * (dims[:, 0] * dims[:, 1] + dims[:, 1] * dims[:, 2] +
+                                              dims[:, 0] * dims[:, 2]) * fill
+        self.mass[part_defs] = self.volume[part_defs] * _DENSITY
+        self.center_of_gravity[part_defs] = lower + dims * rng.uniform(0.4, 0.6, (n_types, 3))
+        box_moments = self.mass[part_defs, np.newaxis] / 12.0 * (
+            (dims ** 2).sum(axis=1)[:, np.newaxis] - dims ** 2)
+        axes = _random_rotations(n_types, rng)
+        self.inertia[part_defs] = np.einsum('nij,nj,nkj->nik', axes, box_moments, axes)
+        self.outline_points[part_defs, 0] = lower
+        self.outline_points[part_defs, 1] = lower + dims
+
+        # poses: children scattered over a cube that grows with the number of siblings
+        siblings = np.bincount(self.parent[1:], minlength=size)
+        self.rotation = np.tile(np.eye(3), (size, 1, 1))
+        self.translation = np.zeros((size, 3))
+        self.rotation[1:] = _random_rotations(size - 1, rng)
+        spread = 150.0 * np.cbrt(siblings[self.parent[1:]])
+        self.translation[1:] = rng.uniform(-1.0, 1.0, (size - 1, 3)) * spread[:, np.newaxis]
+
+        # assemblies, deepest level first: every child of a level's assemblies is one level down
+        for level in range(self.level.max(), 0, -1):
+            rows = np.flatnonzero(self.level == level)
+            child_defs = self.metric_rows[rows]
+            groups = self.metric_rows[self.parent[rows]]
+            parent_defs = np.unique(groups)
+            mass, center_of_gravity, inertia = roll_up(
+                self.mass[child_defs], self.center_of_gravity[child_defs], self.inertia[child_defs],
+                self.rotation[rows], self.translation[rows], groups, n_definitions)
+            self.mass[parent_defs] = mass[parent_defs]
+            self.center_of_gravity[parent_defs] = center_of_gravity[parent_defs]
+            self.inertia[parent_defs] = inertia[parent_defs]
+            self.volume[parent_defs] = np.bincount(groups, self.volume[child_defs], n_definitions)[parent_defs]
+            self.surface_area[parent_defs] = np.bincount(groups, self.surface_area[child_defs],
+                                                         n_definitions)[parent_defs]
+            corners = transform_points(self.rotation[rows], self.translation[rows],
+                                       _box_corners(self.outline_points[child_defs]))
+            outline = np.empty((n_definitions, 2, 3))
+            outline[:, 0], outline[:, 1] = np.inf, -np.inf
+            np.minimum.at(outline[:, 0], groups, corners.min(axis=1))
+            np.maximum.at(outline[:, 1], groups, corners.max(axis=1))
+            self.outline_points[parent_defs] = outline[parent_defs]
+
+        # link points inside each component's box, in the top-assembly frame
+        self.world_rotation, self.world_translation = compose_poses(self.rotation, self.translation, self.parent)
+        self.link_points = np.zeros((size, link_points, 3))
+        if size > 1:
+            outline = self.outline_points[self.metric_rows[1:]]
+            local = outline[:, np.newaxis, 0] + rng.uniform(0.0, 1.0, (size - 1, link_points, 3)) * \
+                (outline[:, np.newaxis, 1] - outline[:, np.newaxis, 0])
+            self.link_points[1:] = transform_points(self.world_rotation[1:], self.world_translation[1:], local)
+
+        self.constrained_to = np.full((size, 2), -1, dtype=np.intp)
+        for row in range(1, size):
+            same_parent = [row - back for back in (1, 2)
+                           if row - back >= 1 and self.parent[row - back] == self.parent[row]]
+            self.constrained_to[row, 0] = same_parent[0] if same_parent else self.parent[row]
+            if len(same_parent) > 1:
+                self.constrained_to[row, 1] = same_parent[1]
+
+    def __len__(self):
+        return len(self.component_ids)
+
+    def children(self, row):
+        """Rows of the children of ``row``."""
+        return np.flatnonzero(self.parent == row)
+
+    def write(self, out_dir):
+        """Write CADAssembly.xml, CADAssembly_metrics.xml and ComputedValues.xml into ``out_dir``."""
+        if not os.path.isdir(out_dir):
+            os.makedirs(out_dir)
+        ids = _IdCounter()
+        with open(os.path.join(out_dir, "CADAssembly.xml"), 'w') as f_out:
+            self._write_cadassembly(f_out, ids)
+        with open(os.path.join(out_dir, "CADAssembly_metrics.xml"), 'w') as f_out:
+            self._write_cadassembly_metrics(f_out, ids)
+        with open(os.path.join(out_dir, "ComputedValues.xml"), 'w') as f_out:
+            self._write_computed_values(f_out, ids)
+
+    def _write_cadassembly(self, f_out, ids):
+        f_out.write(_XML_DECLARATION)
+        f_out.write('<Assemblies xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+                    'xmlns:xsd="http://www.w3.org/2001/XMLSchema" VersionInfo="" '
+                    'xsi:noNamespaceSchemaLocation="AssemblyInterface.xsd">\n')
+        f_out.write('  <Assembly ConfigurationID="{}" _id="{}">\n'.format(self.configuration_id, ids()))
+        children = _children_lists(self.parent)
+
+        def write_component(row, indent):
+            pad = ' ' * indent
+            definition = self.metric_rows[row]
+            f_out.write('{}<CADComponent ComponentID="{}" Name="{}" DisplayName="{}" Type="{}" '
+                        'SpecialInstruction="" MaterialID="" Representation="" _id="{}">\n'.format(
+                            pad, self.component_ids[row], self.names[definition].lower(),
+                            'Component_{}'.format(row), self.cad_type[row], ids()))
+            if row > 0:
+                f_out.write('{}  <Constraint _id="{}">\n'.format(pad, ids()))
+                pairs = [(self.constrained_to[row, 0], 'AXIS', 'ALIGN', 'NONE', 'AXIS'),
+                         (self.constrained_to[row, 0], 'SURFACE', 'MATE', 'SIDE_A', 'PLANE'),
+                         (self.constrained_to[row, 1], 'SURFACE', 'ALIGN', 'SIDE_A', 'CLOCK')]
+                for other, geometry, alignment, orientation, feature in pairs:
+                    if other < 0:
+                        continue
+                    f_out.write('{}    <Pair FeatureInterfaceType="CAD_DATUM" FeatureGeometryType="{}" '
+                                'FeatureAlignmentType="{}" _id="{}">\n'.format(pad, geometry, alignment, ids()))
+                    for comp in (self.component_ids[row], self.component_ids[other]):
+                        f_out.write('{}      <ConstraintFeature ComponentID="{}" FeatureName="MOUNT_{}" '
+                                    'FeatureOrientationType="{}" _id="{}" />\n'.format(
+                                        pad, comp, feature, orientation, ids()))
+                    f_out.write('{}    </Pair>\n'.format(pad))
+                f_out.write('{}  </Constraint>\n'.format(pad))
+            for child in children[row]:
+                write_component(child, indent + 2)
+            f_out.write('{}</CADComponent>\n'.format(pad))
+
+        write_component(0, 4)
+        f_out.write('  </Assembly>\n')
+        f_out.write('</Assemblies>\n')
+
+    def _write_cadassembly_metrics(self, f_out, ids):
+        f_out.write(_XML_DECLARATION)
+        f_out.write('<CADMetricRoot VersionInfo="v1.1.0.0" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+                    'xsi:noNamespaceSchemaLocation="CADMetrics.xsd">\n\n')
+        f_out.write('  <Anomalies _id="{}"/>\n\n'.format(ids()))
+        f_out.write('  <Assemblies _id="{}">\n'.format(ids()))
+        f_out.write('    <Assembly ConfigurationID="{}" _id="{}">\n'.format(self.configuration_id, ids()))
+        children = _children_lists(self.parent)
+
+        def write_component(row, indent):
+            pad = ' ' * indent
+            attributes = 'ComponentInstanceID="{}" MetricID="{}" _id="{}"'.format(
+                self.component_ids[row], self.metric_ids[self.metric_rows[row]], ids())
+            if not children[row]:
+                f_out.write('{}<CADComponent {}/>\n'.format(pad, attributes))
+                return
+            f_out.write('{}<CADComponent {}>\n'.format(pad, attributes))
+            for child in children[row]:
+                write_component(child, indent + 2)
+            f_out.write('{}</CADComponent>\n'.format(pad))
+
+        write_component(0, 6)
+        f_out.write('    </Assembly>\n')
+        f_out.write('  </Assemblies>\n\n')
+        f_out.write('  <Joints _id="{}"/>\n\n'.format(ids()))
+        f_out.write('  <MetricComponents _id="{}">\n'.format(ids()))
+
+        # the top assembly poses every component relative to itself, the other assemblies their children
+        definition_rows = {}
+        for row in range(len(self)):
+            definition_rows.setdefault(self.metric_rows[row], row)
+        for definition, metric_id in enumerate(self.metric_ids):
+            row = definition_rows.get(definition)
+            if row is None:
+                continue  # a part type no part was drawn from
+            if row == 0:
+                posed = range(1, len(self))
+                rotation, translation = self.world_rotation, self.world_translation
+            else:
+                posed = children[row]
+                rotation, translation = self.rotation, self.translation
+            self._write_metric_component(f_out, ids, definition, row, posed, rotation, translation)
+        f_out.write('  </MetricComponents>\n\n')
+        f_out.write('</CADMetricRoot>\n')
+
+    def _write_metric_component(self, f_out, ids, definition, row, posed, rotation, translation):
+        outline = self.outline_points[definition]
+        extent = outline[1] - outline[0]
+        center_of_gravity = self.center_of_gravity[definition]
+        inertia = self.inertia[definition]
+        offset = center_of_gravity
+        inertia_at_default_csys = inertia + self.mass[definition] * (offset.dot(offset) * np.eye(3) -
+                                                                      np.outer(offset, offset))
+        moments, axes = np.linalg.eigh(inertia)
+
+        f_out.write('    <MetricComponent ComponentDefinitionSource="CYPHY" CoordinateSystem="DEFAULT" '
+                    'MetricID="{}" Name="{}" SpecialInstruction="" Type="{}" _id="{}">\n'.format(
+                        self.metric_ids[definition], self.names[definition], self.cad_type[row], ids()))
+        f_out.write('      <BoundingBox {} _id="{}">\n'.format(_xyz(extent), ids()))
+        f_out.write('        <OutlinePoints _id="{}">\n'.format(ids()))
+        for point in outline:
+            f_out.write('          <Point {} _id="{}"/>\n'.format(_xyz(point), ids()))
+        f_out.write('        </OutlinePoints>\n')
+        f_out.write('      </BoundingBox>\n')
+        f_out.write('      <CG {} _id="{}"/>\n'.format(_xyz(center_of_gravity), ids()))
+        if len(posed):
+            f_out.write('      <Children _id="{}">\n'.format(ids()))
+            for child in posed:
+                f_out.write('        <ChildMetric ComponentInstanceID="{}" MetricID="{}" _id="{}">\n'.format(
+                    self.component_ids[child], self.metric_ids[self.metric_rows[child]], ids()))
+                f_out.write('          <RotationMatrix _id="{}">\n'.format(ids()))
+                _write_rows(f_out, ids, rotation[child], 12)
+                f_out.write('          </RotationMatrix>\n')
+                f_out.write('          <Translation {} _id="{}"/>\n'.format(_xyz(translation[child]), ids()))
+                f_out.write('        </ChildMetric>\n')
+            f_out.write('      </Children>\n')
+        for at, tensor in (('DEFAULT_CSYS', inertia_at_default_csys), ('CENTER_OF_GRAVITY', inertia)):
+            f_out.write('      <InertiaTensor At="{}" _id="{}">\n'.format(at, ids()))
+            _write_rows(f_out, ids, tensor, 8)
+            f_out.write('      </InertiaTensor>\n')
+        f_out.write('      <PrincipleMomentsOfInertia _id="{}">\n'.format(ids()))
+        f_out.write('        <RotationMatrix _id="{}">\n'.format(ids()))
+        _write_rows(f_out, ids, axes.T, 10)
+        f_out.write('        </RotationMatrix>\n')
+        _write_rows(f_out, ids, moments[:, np.newaxis], 8)
+        f_out.write('      </PrincipleMomentsOfInertia>\n')
+        f_out.write('      <Scalars _id="{}">\n'.format(ids()))
+        for name, unit, value in (('SurfaceArea', 'mm2', self.surface_area[definition]),
+                                  ('Volume', 'mm3', self.volume[definition]),
+                                  ('Density', 'kg/mm3', _DENSITY),
+                                  ('Mass', 'kg', self.mass[definition])):
+            f_out.write('        <Scalar Name="{}" Unit="{}" Value="{!r}" _id="{}"/>\n'.format(
+                name, unit, float(value), ids()))
+        f_out.write('      </Scalars>\n')
+        f_out.write('      <Units {} _id="{}"/>\n'.format(_UNITS, ids()))
+        f_out.write('    </MetricComponent>\n')
+
+    def _write_computed_values(self, f_out, ids):
+        f_out.write(_XML_DECLARATION)
+        f_out.write('<Components ConfigurationID="{}" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+                    'xsi:noNamespaceSchemaLocation="CADPostProcessingParameters.xsd">\n\n'.format(
+                        self.configuration_id))
+        for row in range(1, len(self)):
+            comp = self.component_ids[row]
+            f_out.write('  <Component ComponentInstanceID="{}" FEAElementID="" _id="{}">\n'.format(comp, ids()))
+            f_out.write('    <Metrics _id="{}">\n'.format(ids()))
+            for index, point in enumerate(self.link_points[row].tolist()):
+                f_out.write('      <Metric ArrayValue="{!r};{!r};{!r}" DataFormat="" MetricID="{}:LINKPOINT{}" '
+                            'MetricName="" Type="VECTOR" Units="millimeter" _id="{}"/>\n'.format(
+                                point[0], point[1], point[2], comp, index + 1, ids()))
+            f_out.write('    </Metrics>\n')
+            f_out.write('  </Component>\n\n')
+        f_out.write('</Components>\n')
+
+
+def write_synthetic_assembly(out_dir, n_components, depth=1, part_types=None, link_points=4, seed=0):
+    """Write the output files of a ``SyntheticAssembly`` into ``out_dir`` and return the assembly."""
+    assembly = SyntheticAssembly(n_components, depth, part_types, link_points, seed)
+    assembly.write(out_dir)
+    return assembly
+
+
+def _random_rotations(size, rng):
+    # (size, 3, 3) rotation matrices drawn uniformly, from unit quaternions
+    quaternions = rng.normal(size=(size, 4))
+    quaternions /= np.linalg.norm(quaternions, axis=1)[:, np.newaxis]
+    w, x, y, z = quaternions.T
+    return np.stack([
+        np.stack([1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)], axis=1),
+        np.stack([2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)], axis=1),
+        np.stack([2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)], axis=1)
+    ], axis=1)
+
+
+class _IdCounter(object):
+    # the _id attributes CyPhy2CAD stamps on every element
+    def __init__(self):
+        self.next_id = 0x7000
+
+    def __call__(self):
+        self.next_id += 1
+        return 'id{:x}'.format(self.next_id)
+
+
+def _children_lists(parent):
+    children = [[] for _ in range(len(parent))]
+    for row in range(1, len(parent)):
+        children[parent[row]].append(row)
+    return children
+
+
+def _xyz(point):
+    return 'X="{!r}" Y="{!r}" Z="{!r}"'.format(float(point[0]), float(point[1]), float(point[2]))
+
+
+def _write_rows(f_out, ids, matrix, indent):
+    pad = ' ' * indent
+    f_out.write('{}<Rows _id="{}">\n'.format(pad, ids()))
+    for row in np.asarray(matrix).tolist():
+        f_out.write('{}  <Row _id="{}">\n'.format(pad, ids()))
+        for value in row:
+            f_out.write('{}    <Column Value="{!r}" _id="{}"/>\n'.format(pad, value, ids()))
+        f_out.write('{}  </Row>\n'.format(pad))
+    f_out.write('{}</Rows>\n'.format(pad))
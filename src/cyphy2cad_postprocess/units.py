@@ -0,0 +1,71 @@
+import numpy as np
+
+
+# size of one unit in meters or kilograms; names are matched ignoring case
+DISTANCE_UNITS = {
+    'millimeter': 1e-3, 'millimeters': 1e-3, 'mm': 1e-3,
+    'centimeter': 1e-2, 'centimeters': 1e-2, 'cm': 1e-2,
+    'meter': 1.0, 'meters': 1.0, 'm': 1.0,
+    'inch': 0.0254, 'inches': 0.0254, 'in': 0.0254,
+    'foot': 0.3048, 'feet': 0.3048, 'ft': 0.3048
+}
+MASS_UNITS = {
+    'gram': 1e-3, 'grams': 1e-3, 'g': 1e-3,
+    'kilogram': 1.0, 'kilograms': 1.0, 'kg': 1.0,
+    'tonne': 1e3, 't': 1e3,
+    'pound': 0.45359237, 'pounds': 0.45359237, 'lbm': 0.45359237, 'lb': 0.45359237
+}
+_UNIT_TABLES = {
+    'distance': DISTANCE_UNITS,
+    'mass': MASS_UNITS
+}
+
+SI_UNITS = {'distance': 'meter', 'mass': 'kilogram'}
+
+_FACTORS = {}  # (kind, from unit, to unit) to conversion factor
+
+
+def conversion_factor(kind, from_unit, to_unit):
+    """Factor converting a ``kind`` ('distance' or 'mass') value from ``from_unit`` to ``to_unit``.
+
+    A unit that is None (not reported or not requested) converts with a factor of 1. Factors are
+    memoized, so converting many groups of components costs one lookup per group.
+    """
+    key = (kind, from_unit, to_unit)
+    factor = _FACTORS.get(key)
+    if factor is None:
+        if from_unit is None or to_unit is None:
+            factor = 1.0
+        else:
+            table = _UNIT_TABLES[kind]
+            try:
+                factor = table[from_unit.lower()] / table[to_unit.lower()]
+            except KeyError:
+                raise ValueError("Unknown {} unit: {}".format(
+                    kind, from_unit if from_unit.lower() not in table else to_unit))
+        _FACTORS[key] = factor
+    return factor
+
+
+def unit_factors(units, target):
+    """``(distance, mass)`` conversion factors from a component ``units`` dict (or None) to ``target``."""
+    units = units or {}
+    return (conversion_factor('distance', units.get('distance'), target.get('distance')),
+            conversion_factor('mass', units.get('mass'), target.get('mass')))
+
+
+def group_by_units(keys):
+    """``{key: row array}`` of the rows sharing each units key (e.g. a ``(distance, mass)`` tuple)."""
+    groups = {}
+    for row, key in enumerate(keys):
+        groups.setdefault(key, []).append(row)
+    return {key: np.array(rows, dtype=np.intp) for key, rows in groups.items()}
+
+
+def converted_units(units, target):
+    """Copy of a component ``units`` dict with its distance and mass units replaced by ``target``'s."""
+    units = dict(units)
+    for kind in _UNIT_TABLES:
+        if target.get(kind) is not None and units.get(kind) is not None:
+            units[kind] = target[kind]
+    return units
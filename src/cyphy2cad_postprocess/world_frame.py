@@ -0,0 +1,130 @@
+import numpy as np
+
+from component_table import ComponentTable
+
+
+class WorldFrame(object):
+    """Geometry of ``CyPhy2CADData.components`` in the top-assembly frame, as stacked arrays.
+
+    Rows match the ComponentTable the frame was built from. Components without a pose (the top assembly)
+    get the identity pose; geometry a component does not have is NaN.
+
+    ==========================  =========  ===================================================
+    posed                       (N,)       whether the component has a pose of its own
+    rotation                    (N, 3, 3)  pose relative to the top assembly
+    translation                 (N, 3)
+    center_of_gravity           (N, 3)
+    outline_points              (N, 2, 3)  bounding box corners
+    box_corners                 (N, 8, 3)  all eight corners of the bounding box
+    bounds                      (N, 2, 3)  axis-aligned min and max corner of ``box_corners``
+    link_points                 (P, 3)     ComputedValues points, grouped by row
+    link_point_rows             (P,)       row of the component of each link point
+    link_point_names            (P,)       e.g. LINKPOINT2A
+    link_point_offsets          (N + 1,)   link points of row ``i`` are ``offsets[i]:offsets[i + 1]``
+    ==========================  =========  ===================================================
+
+    CyPhy2CAD reports the ComputedValues points in the top-assembly frame already, so they are stacked
+    without being transformed.
+    """
+    def __init__(self, table, rotation, translation):
+        self.component_ids = table.component_ids
+        self.index = table.index
+        self.posed = ~np.isnan(table.rotation).any(axis=(1, 2)) & ~np.isnan(table.translation).any(axis=1)
+        self.rotation = rotation
+        self.translation = translation
+
+        self.center_of_gravity = transform_points(rotation, translation, table.center_of_gravity)
+        self.outline_points = transform_points(rotation, translation, table.outline_points)
+        self.box_corners = transform_points(rotation, translation, _box_corners(table.outline_points))
+        self.bounds = np.stack([self.box_corners.min(axis=1), self.box_corners.max(axis=1)], axis=1)
+
+        self.link_points = np.zeros((0, 3))
+        self.link_point_rows = np.zeros(0, dtype=np.intp)
+        self.link_point_names = np.empty(0, dtype=object)
+        self.link_point_offsets = np.zeros(len(table) + 1, dtype=np.intp)
+
+    @classmethod
+    def from_components(cls, components, table=None, parent=None):
+        """Build the frame of ``components``.
+
+        ``table`` is the ComponentTable of ``components`` (built if not given). The poses are relative to
+        the top assembly; for poses relative to a sub-assembly pass ``parent``, a dict mapping those
+        ComponentIDs to the ComponentID of their assembly, and they are composed with ``compose_poses``.
+        """
+        if table is None:
+            table = ComponentTable.from_components(components)
+
+        parent_rows = np.full(len(table), -1, dtype=np.intp)
+        for comp, parent_comp in (parent or {}).items():
+            parent_rows[table.index[comp]] = table.index[parent_comp]
+        rotation, translation = compose_poses(table.rotation, table.translation, parent_rows)
+        world_frame = cls(table, rotation, translation)
+
+        points = []
+        rows = []
+        names = []
+        for row, comp in enumerate(table.component_ids):
+            component_points = components[comp].get('points') or {}
+            for name in sorted(component_points):
+                names.append(name)
+                points.append(component_points[name])
+            rows.extend([row] * len(component_points))
+        if points:
+            world_frame.link_points = np.array(points, dtype=float).reshape(-1, 3)
+            world_frame.link_point_rows = np.array(rows, dtype=np.intp)
+            world_frame.link_point_names = np.array(names, dtype=object)
+            world_frame.link_point_offsets[1:] = np.cumsum(np.bincount(rows, minlength=len(table)))
+        return world_frame
+
+    def __len__(self):
+        return len(self.component_ids)
+
+    def points(self, comp):
+        """Link points of ``comp`` as a dict, the way ``components[comp]['points']`` holds them."""
+        row = self.index[comp]
+        start, stop = self.link_point_offsets[row], self.link_point_offsets[row + 1]
+        return dict(zip(self.link_point_names[start:stop], self.link_points[start:stop]))
+
+
+def compose_poses(rotation, translation, parent):
+    """Compose poses relative to a parent row into poses relative to the root of each row's chain.
+
+    ``rotation`` (N, 3, 3) and ``translation`` (N, 3) of row ``i`` are relative to row ``parent[i]``, or
+    to the root frame where ``parent[i]`` is negative. Missing (NaN) poses are taken as the identity.
+    Every level of the hierarchy is composed with one batched matrix product.
+    """
+    parent = np.asarray(parent, dtype=np.intp)
+    world_rotation = np.array(rotation, dtype=float)
+    world_translation = np.array(translation, dtype=float)
+    unposed = np.isnan(world_rotation).any(axis=(1, 2)) | np.isnan(world_translation).any(axis=1)
+    world_rotation[unposed] = np.eye(3)
+    world_translation[unposed] = 0.0
+
+    resolved = parent < 0
+    while not resolved.all():
+        level = ~resolved & resolved[np.maximum(parent, 0)]
+        if not level.any():
+            raise ValueError("The assembly hierarchy has a cycle")
+        parent_rows = parent[level]
+        world_translation[level] = np.einsum('nij,nj->ni', world_rotation[parent_rows],
+                                             world_translation[level]) + world_translation[parent_rows]
+        world_rotation[level] = np.einsum('nij,njk->nik', world_rotation[parent_rows], world_rotation[level])
+        resolved |= level
+    return world_rotation, world_translation
+
+
+def transform_points(rotation, translation, points):
+    """Apply pose ``i`` to ``points[i]``, an (N, 3) or (N, K, 3) array."""
+    points = np.asarray(points, dtype=float)
+    flat = points.reshape(len(points), -1, 3)
+    transformed = np.einsum('nij,nkj->nki', rotation, flat) + translation[:, np.newaxis, :]
+    return transformed.reshape(points.shape)
+
+
+def _box_corners(outline_points):
+    # (N, 2, 3) opposite corners to the (N, 8, 3) corners of the box they span
+    corners = np.empty((len(outline_points), 8, 3))
+    for corner in range(8):
+        for axis in range(3):
+            corners[:, corner, axis] = outline_points[:, (corner >> axis) & 1, axis]
+    return corners
@@ -0,0 +1,60 @@
+import os.path
+import json
+import shutil
+import tempfile
+
+import unittest
+
+from cyphy2cad_postprocess.batch import find_output_dirs, parse_many, write_many, CYPHY2CAD_OUTPUT_FILES
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        test_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)))
+        self.root_dir = tempfile.mkdtemp()
+        self.design_dirs = []
+        for name in ("design_1", "design_2", os.path.join("nested", "design_3")):
+            design_dir = os.path.join(self.root_dir, name)
+            os.makedirs(design_dir)
+            for filename in CYPHY2CAD_OUTPUT_FILES:
+                shutil.copy(os.path.join(test_dir, filename), design_dir)
+            self.design_dirs.append(design_dir)
+
+        self.broken_dir = os.path.join(self.root_dir, "design_broken")
+        os.makedirs(self.broken_dir)
+        for filename in CYPHY2CAD_OUTPUT_FILES:
+            with open(os.path.join(self.broken_dir, filename), 'w') as f_out:
+                f_out.write("<not xml")
+        os.makedirs(os.path.join(self.root_dir, "not_a_design"))
+
+    def tearDown(self):
+        shutil.rmtree(self.root_dir)
+
+    def test_find_output_dirs(self):
+        self.assertItemsEqual(find_output_dirs(self.root_dir), self.design_dirs + [self.broken_dir])
+
+    def test_parse_many(self):
+        results, errors = parse_many(self.root_dir, processes=2)
+        self.assertItemsEqual(results.keys(), self.design_dirs)
+        self.assertItemsEqual(errors.keys(), [self.broken_dir])
+        for cad_data in results.values():
+            self.assertEqual(len(cad_data.components), 15)
+
+    def test_parse_many_serial(self):
+        results, errors = parse_many(self.design_dirs, processes=1)
+        self.assertItemsEqual(results.keys(), self.design_dirs)
+        self.assertEqual(errors, {})
+
+    def test_write_many(self):
+        results, errors = parse_many(self.design_dirs, processes=1)
+        filename = os.path.join(self.root_dir, "merged.json")
+        write_many(results, filename)
+        with open(filename) as f_in:
+            merged = json.load(f_in)
+        self.assertItemsEqual(merged.keys(), self.design_dirs)
+        self.assertEqual(len(merged[self.design_dirs[0]]["components"]), 15)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+import os.path
+import shutil
+import timeit
+import tempfile
+
+import unittest
+import numpy as np
+import numpy.testing as nptest
+
+from cyphy2cad_postprocess import reader
+from cyphy2cad_postprocess.reader import CyPhy2CADReader, CyPhy2CADData, CYPHY2CAD_OUTPUT_FILES
+from cyphy2cad_postprocess.cache import ParseCache
+from cyphy2cad_postprocess.synthetic import write_synthetic_assembly
+
+
+class TestParseCache(unittest.TestCase):
+
+    def setUp(self):
+        test_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)))
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmp_dir, "cache")
+        self.design_dirs = []
+        for name in ("design_1", "design_2"):
+            design_dir = os.path.join(self.tmp_dir, name)
+            os.makedirs(design_dir)
+            for filename in CYPHY2CAD_OUTPUT_FILES:
+                shutil.copy(os.path.join(test_dir, filename), design_dir)
+            self.design_dirs.append(design_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _cached_reader(self, cache, design_dir):
+        # a reader that fails if it has to parse the XML files
+        cad_reader = CyPhy2CADReader(design_dir, cache=cache)
+
+        def fail(path, cad_data):
+            self.fail("parsed {} instead of loading it from the cache".format(path))
+        for filename, parse_stage, fields in cad_reader._stages():
+            setattr(cad_reader, parse_stage.__name__, fail)
+        return cad_reader
+
+    def _cache_hit(self, cache, design_dir):
+        # parse() of a reader whose ElementTree module fails on any XML file
+        class NoXml(object):
+            def __getattr__(_, name):
+                self.fail("read XML with {}() on a cache hit".format(name))
+        et = reader.et
+        reader.et = NoXml()
+        try:
+            return self._cached_reader(cache, design_dir).parse()
+        finally:
+            reader.et = et
+
+    def test_load_from_cache(self):
+        cache = ParseCache(self.cache_dir)
+        design_dir = self.design_dirs[0]
+        self.assertEqual(cache.load(design_dir), None)
+        cad_data = CyPhy2CADReader(design_dir, cache=cache).parse()
+
+        cached_data = self._cache_hit(cache, design_dir)
+        self.assertEqual(cached_data.dump(), cad_data.dump())
+        top_asm = cached_data.components["{272a6594-975d-4c4f-8cbe-b4f6e4d2b8f0}|1"]
+        self.assertEqual(top_asm["rotation"], None)
+        self.assertEqual(top_asm["units"]["distance"], "millimeter")
+        nptest.assert_array_equal(top_asm["inertia"]["inertia_tensor_at_center_of_gravity"],
+                                  cad_data.components["{272a6594-975d-4c4f-8cbe-b4f6e4d2b8f0}|1"]["inertia"][
+                                      "inertia_tensor_at_center_of_gravity"])
+
+    def test_columns(self):
+        cache = ParseCache(self.cache_dir)
+        design_dir = self.design_dirs[0]
+        cad_data = CyPhy2CADReader(design_dir, cache=cache).parse()
+
+        # the manifest holds no component data, the components are rebuilt from the npz columns
+        manifest_path, arrays_path = cache._entry_paths(design_dir)
+        with open(manifest_path) as f_in:
+            manifest = f_in.read()
+        for comp in cad_data.components:
+            self.assertNotIn(comp, manifest)
+        # and the npz holds the same few arrays however many constraints, link points, ... there are
+        arrays = np.load(arrays_path)
+        self.assertEqual(sorted(arrays.files), ["component_ids", "floats", "json", "rows"])
+        arrays.close()
+
+        # a hit is faster than parsing again, even for a small design
+        parse_seconds = min(timeit.repeat(lambda: CyPhy2CADReader(design_dir).parse(), number=10, repeat=3))
+        hit_seconds = min(timeit.repeat(lambda: CyPhy2CADReader(design_dir, cache=cache).parse(), number=10,
+                                        repeat=3))
+        self.assertLess(hit_seconds, parse_seconds)
+
+        # values of other types and shapes survive too
+        odd_data = CyPhy2CADData()
+        odd_data.components.update({
+            "a": {"name": u"caf\xe9", "count": 3, "empty": {}, "nested": [[1.5, None], []],
+                  "shapes": [np.zeros(2), np.ones((2, 2))], "point": np.arange(3.0)},
+            "b": {"point": np.arange(3.0) + 1, "flags": np.array([True, False]), "name": None}
+        })
+        cache.store(design_dir, odd_data)
+        components = cache.load(design_dir).components
+        self.assertEqual(components["a"]["name"], u"caf\xe9".encode("utf-8"))
+        self.assertEqual(components["a"]["count"], 3)
+        self.assertEqual(components["a"]["empty"], {})
+        self.assertEqual(components["a"]["nested"], [[1.5, None], []])
+        nptest.assert_array_equal(components["a"]["shapes"][1], np.ones((2, 2)))
+        nptest.assert_array_equal(components["b"]["point"], [1.0, 2.0, 3.0])
+        self.assertEqual(components["b"]["flags"], [True, False])
+        self.assertIsNone(components["b"]["name"])
+        self.assertEqual(sorted(components["b"]), ["flags", "name", "point"])
+
+    def test_refresh_after_hit(self):
+        cache = ParseCache(self.cache_dir)
+        design_dir = os.path.join(self.tmp_dir, "synthetic")
+        write_synthetic_assembly(design_dir, 6)
+        CyPhy2CADReader(design_dir, cache=cache).parse()
+        cad_reader = CyPhy2CADReader(design_dir, cache=cache)
+        self.assertEqual(len(self._cache_hit(cache, design_dir).components), 6)
+
+        # the design shrinks: refresh() drops the components the files no longer list, also from the cache
+        cad_reader.parse()
+        write_synthetic_assembly(design_dir, 4)
+        self.assertEqual(sorted(cad_reader.refresh()), sorted(CYPHY2CAD_OUTPUT_FILES))
+        expected = CyPhy2CADReader(design_dir, parse=True).cad_data.dump()
+        self.assertEqual(len(cad_reader.cad_data.components), 4)
+        self.assertEqual(cad_reader.cad_data.dump(), expected)
+        self.assertEqual(self._cache_hit(cache, design_dir).dump(), expected)
+
+    def test_stale_entry(self):
+        for hash_contents in (False, True):
+            cache = ParseCache(self.cache_dir, hash_contents=hash_contents)
+            design_dir = self.design_dirs[0]
+            CyPhy2CADReader(design_dir, cache=cache).parse()
+            self.assertNotEqual(cache.load(design_dir), None)
+
+            metrics_xml = os.path.join(design_dir, "CADAssembly_metrics.xml")
+            stat = os.stat(metrics_xml)
+            os.utime(metrics_xml, (stat.st_atime, stat.st_mtime + 10))
+            self.assertEqual(cache.load(design_dir), None)
+
+    def test_invalidate(self):
+        cache = ParseCache(self.cache_dir)
+        for design_dir in self.design_dirs:
+            CyPhy2CADReader(design_dir, cache=cache).parse()
+        cache.invalidate(self.design_dirs[0])
+        self.assertEqual(cache.load(self.design_dirs[0]), None)
+        self.assertNotEqual(cache.load(self.design_dirs[1]), None)
+        cache.invalidate()
+        self.assertEqual(cache.load(self.design_dirs[1]), None)
+        self.assertEqual(cache.size(), 0)
+
+    def test_eviction(self):
+        cache = ParseCache(self.cache_dir)
+        CyPhy2CADReader(self.design_dirs[0], cache=cache).parse()
+        entry_size = cache.size()
+        self.assertGreater(entry_size, 0)
+
+        cache.max_bytes = entry_size + entry_size // 2
+        CyPhy2CADReader(self.design_dirs[1], cache=cache).parse()
+        self.assertLessEqual(cache.size(), cache.max_bytes)
+        self.assertEqual(cache.load(self.design_dirs[0]), None)
+        self.assertNotEqual(cache.load(self.design_dirs[1]), None)
+
+
+if __name__ == '__main__':
+    unittest.main()
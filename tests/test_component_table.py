@@ -0,0 +1,61 @@
+import os.path
+
+import unittest
+import numpy as np
+import numpy.testing as nptest
+
+from cyphy2cad_postprocess.reader import CyPhy2CADReader
+
+
+class TestComponentTable(unittest.TestCase):
+
+    def setUp(self):
+        cad_output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)))
+        self.cad_data = CyPhy2CADReader(cyphy2cad_output_dir=cad_output_dir, parse=True).cad_data
+        self.top_asm_id = "{272a6594-975d-4c4f-8cbe-b4f6e4d2b8f0}|1"
+
+    def test_columns_match_components(self):
+        table = self.cad_data.table
+        components = self.cad_data.components
+        self.assertEqual(len(table), len(components))
+        self.assertEqual(table.mass.shape, (15,))
+        self.assertEqual(table.translation.shape, (15, 3))
+        self.assertEqual(table.rotation.shape, (15, 3, 3))
+        self.assertEqual(table.inertia.shape, (15, 3, 3))
+        for comp, component_data in components.items():
+            row = table.index[comp]
+            self.assertEqual(table.component_ids[row], comp)
+            self.assertEqual(table.mass[row], component_data["mass"])
+            nptest.assert_array_equal(table.center_of_gravity[row], component_data["center_of_gravity"])
+            nptest.assert_array_equal(table.inertia[row],
+                                      component_data["inertia"]["inertia_tensor_at_center_of_gravity"])
+
+        # the top assembly has no pose
+        self.assertTrue(np.isnan(table.rotation[table.index[self.top_asm_id]]).all())
+        self.assertTrue(np.isnan(table.translation[table.index[self.top_asm_id]]).all())
+
+    def test_queries(self):
+        table = self.cad_data.table
+        parts = table.parts()
+        self.assertEqual(parts.sum(), 12)
+        self.assertAlmostEqual(table.total_mass(parts), 20.41012, 4)
+        # the top assembly mass equals the sum of its children, the leaves
+        leaves = table.leaves()
+        self.assertEqual(leaves.sum(), 14)
+        self.assertFalse(leaves[table.index[self.top_asm_id]])
+        self.assertTrue((table.parent[leaves] == table.index[self.top_asm_id]).all())
+        self.assertAlmostEqual(table.total_mass(), 20.786552812349075, 6)
+        self.assertAlmostEqual(table.total_mass(np.ones(len(table), dtype=bool)), 2 * 20.786552812349075, 6)
+        self.assertItemsEqual(table.mass_above(6.0), [self.top_asm_id])
+        nptest.assert_array_equal(table.rows([self.top_asm_id]), [table.index[self.top_asm_id]])
+
+    def test_table_is_rebuilt(self):
+        table = self.cad_data.table
+        self.assertIs(self.cad_data.table, table)
+        self.cad_data.components[self.top_asm_id]["mass"] = 1.0
+        del self.cad_data.table
+        self.assertEqual(self.cad_data.table.mass[self.cad_data.table.index[self.top_asm_id]], 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
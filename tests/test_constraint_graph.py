@@ -0,0 +1,75 @@
+import os.path
+
+import unittest
+import numpy as np
+
+from cyphy2cad_postprocess.reader import CyPhy2CADReader
+from cyphy2cad_postprocess.constraint_graph import ConstraintGraph
+
+
+class TestConstraintGraph(unittest.TestCase):
+
+    def setUp(self):
+        cad_output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)))
+        self.cad_data = CyPhy2CADReader(cyphy2cad_output_dir=cad_output_dir, parse=True).cad_data
+        self.top_asm_id = "{272a6594-975d-4c4f-8cbe-b4f6e4d2b8f0}|1"
+        self.chassis_id = "0293b7a1-af8e-4522-8707-6fbf786585db"
+        self.lidar_ids = ["5c964f2c-cd43-458b-90c2-b27754253920", "76cddc75-c978-44ff-b83b-d3825ad83564"]
+
+    def test_constraints_are_parsed(self):
+        constraints = self.cad_data.components["28c38de6-a26e-4c44-926d-a63173498dac041ce927-77c2-4099-b0bc-7ac113d3a0f3"]["constraints"]
+        self.assertEqual(len(constraints), 1)
+        self.assertEqual(len(constraints[0]), 3)
+        self.assertEqual(constraints[0][0], {
+            "feature_interface_type": "CAD_DATUM",
+            "feature_geometry_type": "AXIS",
+            "feature_alignment_type": "ALIGN",
+            "constraint_features": [
+                {"component_id": "28c38de6-a26e-4c44-926d-a63173498dac041ce927-77c2-4099-b0bc-7ac113d3a0f3",
+                 "feature_name": "CENTER_AXIS", "feature_orientation_type": "NONE"},
+                {"component_id": "28c38de6-a26e-4c44-926d-a63173498dac59d3d05e-251f-4cab-bf72-ef784f039bf0",
+                 "feature_name": "TUBE_MOUNT_AXIS", "feature_orientation_type": "NONE"}]})
+        self.assertIsNone(self.cad_data.components[self.top_asm_id]["constraints"])
+
+    def test_queries(self):
+        graph = self.cad_data.constraint_graph
+        self.assertIs(self.cad_data.constraint_graph, graph)
+        self.assertEqual(len(graph), 15)
+        self.assertEqual(len(graph.edge_rows), 45)
+        self.assertEqual(graph.indptr[-1], 90)
+
+        self.assertEqual(graph.neighbors(self.chassis_id), set([
+            self.top_asm_id, self.lidar_ids[0], self.lidar_ids[1],
+            "28c38de6-a26e-4c44-926d-a63173498dac59d3d05e-251f-4cab-bf72-ef784f039bf0",
+            "534f409d-2648-4d43-8a8f-88449313af9e59d3d05e-251f-4cab-bf72-ef784f039bf0"]))
+        self.assertIn((self.top_asm_id, "FRONT", "ASM_FRONT", "SURFACE"), graph.constraints(self.chassis_id))
+
+        self.assertEqual(len(graph.connected_components()), 1)
+        self.assertEqual(graph.cyclic().tolist(), [True])
+        # the tubes close a loop through the chassis; the lidars and the top assembly hang off it
+        loop = graph.loop_components()
+        self.assertEqual(len(loop), 12)
+        self.assertIn(self.chassis_id, loop)
+        for comp in self.lidar_ids + [self.top_asm_id]:
+            self.assertNotIn(comp, loop)
+
+    def test_chain_and_groups(self):
+        size = 5000
+        chain = np.stack([np.arange(1, size), np.arange(size - 1)], axis=1)
+        edge_rows = np.concatenate([chain, [[0, 2], [0, 2]]])
+        graph = ConstraintGraph(["c{}".format(i) for i in range(size + 2)], edge_rows,
+                                np.full((len(edge_rows), 2), "AXIS", dtype=object), ["AXIS"] * len(edge_rows))
+        self.assertEqual(sorted(graph.loop_components()), ["c0", "c1", "c2"])
+        self.assertEqual([len(group) for group in graph.connected_components()], [size, 1, 1])
+        self.assertEqual(graph.cyclic().tolist(), [True, False, False])
+        self.assertEqual(graph.connected_component_labels()[[0, size - 1, size, size + 1]].tolist(), [0, 0, 1, 2])
+
+        # repeated pairs between two components are not a loop
+        graph = ConstraintGraph(["a", "b"], [[0, 1], [1, 0]], [["X", "Y"], ["Y", "X"]], ["AXIS", "SURFACE"])
+        self.assertEqual(graph.cyclic().tolist(), [False])
+        self.assertEqual(graph.loop_components(), [])
+        self.assertEqual(graph.constraints("a"), [("b", "X", "Y", "AXIS"), ("b", "X", "Y", "SURFACE")])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import os.path
+
+import unittest
+import numpy as np
+import numpy.testing as nptest
+
+from cyphy2cad_postprocess.reader import CyPhy2CADReader
+from cyphy2cad_postprocess.design_diff import diff_designs
+
+
+class TestDesignDiff(unittest.TestCase):
+
+    def setUp(self):
+        self.cad_output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)))
+        self.baseline = self._parse()
+        self.tube_id = "28c38de6-a26e-4c44-926d-a63173498dac041ce927-77c2-4099-b0bc-7ac113d3a0f3"
+        self.chassis_id = "0293b7a1-af8e-4522-8707-6fbf786585db"
+
+    def _parse(self):
+        return CyPhy2CADReader(cyphy2cad_output_dir=self.cad_output_dir, parse=True).cad_data
+
+    def test_same_design(self):
+        diff = diff_designs(self.baseline, [self._parse(), self._parse()])
+        self.assertTrue(diff.present.all())
+        self.assertFalse(diff.changed().any())
+        self.assertEqual(diff.changed_designs(), [])
+        self.assertEqual(diff.added, [[], []])
+        self.assertEqual(diff.removed, [[], []])
+
+    def test_variants(self):
+        heavier = self._parse()
+        heavier.components[self.tube_id]["mass"] += 1e-4
+        moved = self._parse()
+        moved.components[self.tube_id]["translation"] = moved.components[self.tube_id]["translation"] + [0.0, 5.0, 0.0]
+        swapped = self._parse()
+        swapped.components["new-part"] = {"mass": 1.0}
+        del swapped.components[self.chassis_id]
+
+        diff = diff_designs(self.baseline, {"heavier": heavier, "moved": moved, "swapped": swapped},
+                            atol={"mass": 1e-3, "translation": 1e-6})
+        self.assertItemsEqual(diff.changed_designs(), ["moved", "swapped"])
+        self.assertEqual(diff.changes("heavier"), {})
+        self.assertEqual(diff.changes("moved"), {self.tube_id: ["translation"]})
+        row = diff.index[self.tube_id]
+        nptest.assert_allclose(diff.delta("translation")[diff.designs.index("moved"), row], [0.0, 5.0, 0.0])
+        self.assertAlmostEqual(diff.delta("mass")[diff.designs.index("heavier"), row], 1e-4)
+
+        k = diff.designs.index("swapped")
+        self.assertEqual(diff.added[k], ["new-part"])
+        self.assertEqual(diff.removed[k], [self.chassis_id])
+        self.assertFalse(diff.present[k, diff.index[self.chassis_id]])
+        self.assertTrue(np.isnan(diff.values["mass"][k, diff.index[self.chassis_id]]))
+        self.assertEqual(diff.changes("swapped"), {})
+
+        exact = diff_designs(self.baseline, heavier)
+        self.assertEqual(exact.changes(0), {self.tube_id: ["mass"]})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import os.path
+import shutil
+import tempfile
+
+import unittest
+import numpy as np
+import numpy.testing as nptest
+
+from cyphy2cad_postprocess.reader import CyPhy2CADReader
+from cyphy2cad_postprocess.interference import INTERFERENCE_FILE, candidate_pairs, interfering_components, \
+    read_interference_report, sweep_and_prune
+
+
+class TestInterference(unittest.TestCase):
+
+    def setUp(self):
+        self.cad_output_dir = cad_output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)))
+        self.cad_data = CyPhy2CADReader(cyphy2cad_output_dir=cad_output_dir, parse=True).cad_data
+
+    def test_report(self):
+        report = self.cad_data.interference
+        self.assertEqual(report["assembly_name"], "TestModel_1.asm")
+        self.assertEqual(report["metric_id"], "id-0067-000037c9")
+        self.assertEqual(report["interference_count"], 2)
+        self.assertTrue(report["completed"])
+        self.assertEqual(report["warnings"], [])
+        self.assertEqual(report["pairs"], [
+            {"part_1_name": "A_2119_01_6Z", "part_2_name": "HEBI_X5_9_5Z", "volume": 459.864, "units": "mm3"},
+            {"part_1_name": "A_2119_01_11Z", "part_2_name": "HEBI_X5_9_10Z", "volume": 459.864, "units": "mm3"}])
+        self.assertEqual(interfering_components(report, self.cad_data.components), [
+            ("28c38de6-a26e-4c44-926d-a63173498dace8ed074f-44f8-4354-931c-23c060d06b5a",
+             "28c38de6-a26e-4c44-926d-a63173498dacce7ec15c-0bda-4d5c-81ba-d149e6d990b8"),
+            ("534f409d-2648-4d43-8a8f-88449313af9ee8ed074f-44f8-4354-931c-23c060d06b5a",
+             "534f409d-2648-4d43-8a8f-88449313af9ece7ec15c-0bda-4d5c-81ba-d149e6d990b8")])
+
+    def test_malformed_rows(self):
+        with open(os.path.join(self.cad_output_dir, INTERFERENCE_FILE)) as f_in:
+            lines = f_in.read().splitlines()
+        last_row = next(row for row, line in enumerate(lines) if line.startswith("Interference analysis")) - 1
+        lines[last_row:last_row] = [lines[last_row].replace("459.864", "N/A    "), "   (end of table)"]
+        out_dir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(out_dir, INTERFERENCE_FILE)
+            with open(filename, "w") as f_out:
+                f_out.write("\n".join(lines) + "\n")
+            report = read_interference_report(filename)
+        finally:
+            shutil.rmtree(out_dir)
+        self.assertEqual(report["pairs"], self.cad_data.interference["pairs"])
+        self.assertTrue(report["completed"])
+        self.assertEqual(len(report["warnings"]), 2)
+        self.assertIn("N/A", report["warnings"][0])
+        self.assertIn("(end of table)", report["warnings"][1])
+
+    def test_candidate_pairs(self):
+        candidates = set(frozenset(pair) for pair in candidate_pairs(self.cad_data.world_frame))
+        self.assertNotIn("{272a6594-975d-4c4f-8cbe-b4f6e4d2b8f0}|1", set().union(*candidates))
+        for pair in interfering_components(self.cad_data.interference, self.cad_data.components):
+            self.assertIn(frozenset(pair), candidates)
+
+    def test_sweep_and_prune(self):
+        random = np.random.RandomState(0)
+        lower = random.uniform(0.0, 100.0, (200, 3))
+        bounds = np.stack([lower, lower + random.uniform(0.0, 10.0, (200, 3))], axis=1)
+        bounds[7] = np.nan
+        for tolerance in (0.0, 2.0):
+            with np.errstate(invalid='ignore'):
+                expected = [(i, j) for i in range(len(bounds)) for j in range(i + 1, len(bounds))
+                            if np.all(bounds[i, 0] - tolerance <= bounds[j, 1]) and
+                            np.all(bounds[j, 0] - tolerance <= bounds[i, 1])]
+            nptest.assert_array_equal(sweep_and_prune(bounds, tolerance), np.array(expected).reshape(-1, 2))
+        self.assertEqual(sweep_and_prune(np.zeros((0, 2, 3))).shape, (0, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
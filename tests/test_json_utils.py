@@ -0,0 +1,79 @@
+import json
+import StringIO
+
+import unittest
+import numpy as np
+
+from cyphy2cad_postprocess.json_encoders import NumpyEncoder
+from cyphy2cad_postprocess.json_utils import json_reformat_lists, json_dump_reformatted, json_dumps_reformatted, \
+    json_loads_arrays
+
+
+class TestJsonDumpReformatted(unittest.TestCase):
+
+    def _reformatted(self, obj):
+        json_str = json.dumps(obj, indent=4, separators=(',', ': '), sort_keys=True, cls=NumpyEncoder)
+        return json_reformat_lists(json_str)
+
+    def test_matches_json_reformat_lists(self):
+        obj = {
+            "vector": np.array([1.0, -2.5, 1e-20]),
+            "matrix": np.array([[1.0, 0.0], [0.0, 1.0]]),
+            "column": np.array([[1.0], [2.0]]),
+            "big": [1e+20, 2.0],
+            "big_matrix": np.array([[1e+20, 2.0], [1.0, 2.0]]),
+            "nan_vector": np.array([np.nan, 1.0]),
+            "empty_matrix": np.zeros((0, 3)),
+            "ints": [1, 2, 3],
+            "words": ["millimeter", "kg_mm/sec2", "a.b-c"],
+            "spaces": ["kg mm/sec2", "second"],
+            "empty_string": ["", "a"],
+            "mixed": [1.0, {"a": 1}, [2.0, 3.0]],
+            "special": [float('nan'), float('inf'), -float('inf'), None, True, False],
+            "empty": {"list": [], "dict": {}, "array": np.zeros(0)},
+            "scalars": {"float": np.float64(0.1), "float32": np.float32(0.5), "none": None, "unicode": u"\xe9t\xe9"},
+            u"unicode_key": [u"\xe9"],
+            "nested": {"points": {"LINKPOINT1": np.array([149.2, -170.0, 11.4])}}
+        }
+        self.assertEqual(json_dumps_reformatted(obj), self._reformatted(obj))
+
+    def test_dump_to_file_handle(self):
+        obj = {"components": {str(comp): {"translation": np.arange(3.0) * comp} for comp in range(50)}}
+        f_out = StringIO.StringIO()
+        json_dump_reformatted(obj, f_out, buffer_size=7)
+        self.assertEqual(f_out.getvalue(), self._reformatted(obj))
+
+    def test_not_serializable(self):
+        with self.assertRaises(TypeError):
+            json_dumps_reformatted({"a": object()})
+
+
+class TestJsonLoadArrays(unittest.TestCase):
+
+    def test_round_trip(self):
+        obj = {"components": {"a": {
+            "rotation": np.eye(3),
+            "translation": None,
+            "bounding_box": {"bounding_box": np.array([1.0, 2.0, 3.0]), "outline_points": np.zeros((2, 3))},
+            "inertia": {"principle_moments_of_inertia": {"principle_moments": np.array([[1.0], [2.0], [3.0]])}},
+            "points": {"LINKPOINT1": np.array([149.2, -170.0, np.nan])},
+            "constraints": [[{"constraint_features": [{"feature_name": "AXIS"}]}]],
+            "units": {"mass": "kilogram"},
+            "names": ["a", "b"],
+            "mass": 2.5
+        }}}
+        json_str = json_dumps_reformatted(obj)
+        loaded = json_loads_arrays(json_str)
+        component = loaded["components"]["a"]
+        self.assertEqual(json_dumps_reformatted(loaded), json_str)
+        self.assertIsInstance(component["rotation"], np.ndarray)
+        self.assertEqual(component["inertia"]["principle_moments_of_inertia"]["principle_moments"].shape, (3, 1))
+        self.assertEqual(component["bounding_box"]["outline_points"].shape, (2, 3))
+        self.assertTrue(np.isnan(component["points"]["LINKPOINT1"][2]))
+        self.assertIs(type(component["units"]["mass"]), str)
+        self.assertIs(type(component["names"][0]), str)
+        self.assertIs(type(loaded["components"].keys()[0]), str)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import os.path
+
+import unittest
+import numpy as np
+
+from cyphy2cad_postprocess.reader import CyPhy2CADReader
+from cyphy2cad_postprocess.link_point_index import LinkPointIndex
+
+
+class TestLinkPointIndex(unittest.TestCase):
+
+    def setUp(self):
+        cad_output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)))
+        self.cad_data = CyPhy2CADReader(cyphy2cad_output_dir=cad_output_dir, parse=True).cad_data
+        self.chassis_id = "0293b7a1-af8e-4522-8707-6fbf786585db"
+        self.tube_id = "28c38de6-a26e-4c44-926d-a63173498dac59d3d05e-251f-4cab-bf72-ef784f039bf0"
+
+    def test_queries(self):
+        index = self.cad_data.link_point_index
+        self.assertIs(self.cad_data.link_point_index, index)
+        self.assertEqual(len(index), 56)
+
+        point = self.cad_data.components[self.tube_id]["points"]["LINKPOINT1"]
+        self.assertEqual(index.nearest(point), (self.tube_id, "LINKPOINT1", 0.0))
+        self.assertEqual(index.nearest(point, exclude_component=self.tube_id)[:2], (self.chassis_id, "LINKPOINT1"))
+
+        within = index.within(point, 10.0)
+        self.assertItemsEqual([(comp, name) for comp, name, _ in within],
+                              [(self.tube_id, "LINKPOINT1"), (self.chassis_id, "LINKPOINT1"),
+                               (self.tube_id, "LINKPOINT1A"), (self.chassis_id, "LINKPOINT1A")])
+        self.assertEqual(sorted(distance for _, _, distance in within), [distance for _, _, distance in within])
+
+        mating = index.mating_pairs(1e-3)
+        self.assertEqual(len(mating), 20)
+        self.assertIn(frozenset([(self.tube_id, "LINKPOINT1"), (self.chassis_id, "LINKPOINT1")]),
+                      [frozenset([(comp_a, name_a), (comp_b, name_b)]) for comp_a, name_a, comp_b, name_b, _ in mating])
+        for comp_a, _, comp_b, _, distance in mating:
+            self.assertNotEqual(comp_a, comp_b)
+            self.assertLessEqual(distance, 1e-3)
+
+    def test_matches_brute_force(self):
+        random = np.random.RandomState(0)
+        points = random.uniform(0.0, 100.0, (500, 3))
+        index = LinkPointIndex(points, np.arange(500) // 5, ["LINKPOINT{}".format(i) for i in range(500)],
+                               leaf_size=4)
+        for query in random.uniform(-10.0, 110.0, (20, 3)):
+            distances = np.linalg.norm(points - query, axis=1)
+            self.assertEqual(index.nearest(query)[1], "LINKPOINT{}".format(np.argmin(distances)))
+            self.assertEqual(sorted(name for _, name, _ in index.within(query, 15.0)),
+                             sorted("LINKPOINT{}".format(i) for i in np.flatnonzero(distances <= 15.0)))
+
+        tolerance = 4.0
+        expected = set((i, j) for i in range(500) for j in range(i + 1, 500)
+                       if i // 5 != j // 5 and np.linalg.norm(points[i] - points[j]) <= tolerance)
+        found = set(tuple(sorted([int(name_a[9:]), int(name_b[9:])]))
+                    for _, name_a, _, name_b, _ in index.mating_pairs(tolerance))
+        self.assertEqual(found, expected)
+
+    def test_empty(self):
+        index = LinkPointIndex(np.zeros((0, 3)), [], [])
+        self.assertIsNone(index.nearest([0.0, 0.0, 0.0]))
+        self.assertEqual(index.within([0.0, 0.0, 0.0], 1.0), [])
+        self.assertEqual(index.mating_pairs(1.0), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import os.path
+import shutil
+import tempfile
+
+import unittest
+import numpy as np
+import numpy.testing as nptest
+
+from cyphy2cad_postprocess.reader import CyPhy2CADReader
+from cyphy2cad_postprocess.mass_properties import check_mass_properties, roll_up
+from cyphy2cad_postprocess.synthetic import write_synthetic_assembly
+
+
+class TestMassProperties(unittest.TestCase):
+
+    def setUp(self):
+        self.cad_output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)))
+        self.cad_data = CyPhy2CADReader(cyphy2cad_output_dir=self.cad_output_dir, parse=True).cad_data
+        self.top_asm_id = "{272a6594-975d-4c4f-8cbe-b4f6e4d2b8f0}|1"
+
+    def test_matches_reported_top_assembly(self):
+        check = check_mass_properties(self.cad_data)
+        top_asm = self.cad_data.components[self.top_asm_id]
+        self.assertAlmostEqual(check.mass[0], 20.786552812349075, 9)
+        nptest.assert_allclose(check.center_of_gravity[0], top_asm["center_of_gravity"], atol=1e-9)
+        nptest.assert_allclose(check.inertia[0], top_asm["inertia"]["inertia_tensor_at_center_of_gravity"],
+                               rtol=1e-6, atol=0.1)
+        self.assertTrue(check.passed[0])
+        self.assertEqual(check.failed(), [])
+
+    def test_batch(self):
+        broken = CyPhy2CADReader(cyphy2cad_output_dir=self.cad_output_dir, parse=True).cad_data
+        broken.components["a316bf0e-b929-4b55-a142-489eaad74273"]["mass"] *= 2
+        check = check_mass_properties({"good": self.cad_data, "broken": broken, "also good": self.cad_data})
+        self.assertEqual(check.failed(), ["broken"])
+        self.assertGreater(check.mass_error[check.designs.index("broken")], 1e-3)
+        nptest.assert_allclose(check.mass[check.designs.index("good")], check.mass[check.designs.index("also good")])
+
+    def test_nested_assemblies(self):
+        # sub-assembly parts are posed too, but only the top assembly's children are rolled up
+        out_dir = tempfile.mkdtemp()
+        try:
+            for depth in (2, 3):
+                write_synthetic_assembly(out_dir, 200, depth=depth)
+                cad_data = CyPhy2CADReader(cyphy2cad_output_dir=out_dir, parse=True).cad_data
+                check = check_mass_properties(cad_data, rtol=1e-9)
+                self.assertTrue(check.passed[0], "depth {}: mass error {}".format(depth, check.mass_error[0]))
+        finally:
+            shutil.rmtree(out_dir)
+
+    def test_roll_up(self):
+        # two unit point masses on either side of the origin
+        quarter_turn = np.array([[0.0, -1.0, 0.0], [1.0, 0.0, 0.0], [0.0, 0.0, 1.0]])
+        mass, center_of_gravity, inertia = roll_up(
+            np.array([1.0, 1.0]), np.array([[1.0, 0.0, 0.0], [0.0, 0.0, 0.0]]), np.zeros((2, 3, 3)),
+            np.array([quarter_turn, np.eye(3)]), np.array([[0.0, 0.0, 0.0], [0.0, -1.0, 0.0]]))
+        nptest.assert_allclose(mass, [2.0])
+        nptest.assert_allclose(center_of_gravity, [[0.0, 0.0, 0.0]], atol=1e-12)
+        nptest.assert_allclose(inertia[0], np.diag([2.0, 0.0, 2.0]), atol=1e-12)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import os.path
+import shutil
+import tempfile
+
+import unittest
+import numpy.testing as nptest
+
+from cyphy2cad_postprocess.reader import CyPhy2CADReader
+from cyphy2cad_postprocess.cache import ParseCache
+
+
+class TestMetricIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.cad_output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)))
+        self.cad_data = CyPhy2CADReader(cyphy2cad_output_dir=self.cad_output_dir, parse=True).cad_data
+        self.top_asm_id = "{272a6594-975d-4c4f-8cbe-b4f6e4d2b8f0}|1"
+
+    def test_join(self):
+        metrics = self.cad_data.metrics
+        self.assertEqual(len(metrics), 60)
+        self.assertEqual(metrics.missing(), [])
+
+        mass = metrics["id-0067-000037c8"]
+        self.assertEqual(mass["metric_type"], "Mass")
+        self.assertEqual(mass["component_instance_id"], self.top_asm_id)
+        self.assertTrue(mass["requested"] and mass["computed"])
+        self.assertEqual(mass["value"], 20.786552812349075)
+        self.assertEqual(mass["units"], "kilogram")
+        self.assertIs(mass["component"], self.cad_data.components[self.top_asm_id])
+
+        # link points are the <ComponentInstanceID>:<point name> metrics
+        tube_id = "28c38de6-a26e-4c44-926d-a63173498dac041ce927-77c2-4099-b0bc-7ac113d3a0f3"
+        point = metrics[tube_id + ":LINKPOINT1"]
+        self.assertEqual(point["metric_type"], "Point")
+        nptest.assert_array_equal(point["value"], self.cad_data.components[tube_id]["points"]["LINKPOINT1"])
+        self.assertEqual(len(metrics.for_component(tube_id)), 4)
+
+        # the interference count comes from the interference report
+        self.assertEqual(metrics["id-0067-000037c9"]["value"], 2)
+
+        ground, = metrics.complex_metrics(self.top_asm_id)
+        self.assertEqual((ground["type"], ground["sub_type"]), ("Plane", "GROUND"))
+        self.assertEqual(len(ground["metrics"]), 3)
+        nptest.assert_array_equal(ground["metrics"][0]["value"], [0.0, -243.1396802, 0.0])
+
+    def test_missing(self):
+        cad_output_dir = tempfile.mkdtemp()
+        try:
+            for filename in ("CADAssembly.xml", "CADAssembly_metrics.xml", "ComputedValues.xml", "RequestedMetrics.xml"):
+                shutil.copy(os.path.join(self.cad_output_dir, filename), cad_output_dir)
+            cad_reader = CyPhy2CADReader(cyphy2cad_output_dir=cad_output_dir, lazy=True)
+            cad_reader.parse()
+            self.assertIsNone(cad_reader.cad_data.metrics)
+            metrics = cad_reader.read_metrics()
+            self.assertIs(cad_reader.cad_data.metrics, metrics)
+            self.assertEqual([(entry["metric_id"], entry["metric_type"]) for entry in metrics.missing()],
+                             [("id-0067-000037c9", "InterferenceCount")])
+            self.assertIsNone(metrics["id-0067-000037c9"]["value"])
+        finally:
+            shutil.rmtree(cad_output_dir)
+
+    def test_from_cache(self):
+        cache_dir = tempfile.mkdtemp()
+        try:
+            cache = ParseCache(cache_dir)
+            CyPhy2CADReader(cyphy2cad_output_dir=self.cad_output_dir, parse=True, cache=cache)
+            cad_reader = CyPhy2CADReader(cyphy2cad_output_dir=self.cad_output_dir, cache=cache, instrument=True)
+            cad_reader._parse_computed_values_xml = None  # a cache hit does not run the stages
+            cad_data = cad_reader.parse()
+            # nor does it read the metrics until they are needed
+            self.assertEqual([stage.name for stage in cad_reader.stats], ["cache", "CADAssembly_interference.txt"])
+            self.assertEqual(len(cad_data.metrics), 60)
+            self.assertIn("RequestedMetrics.xml", cad_reader.stats)
+            self.assertEqual(cad_data.metrics["id-0067-000037c8"]["component"]["mass"], 20.786552812349075)
+        finally:
+            shutil.rmtree(cache_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
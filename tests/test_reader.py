@@ -1,10 +1,14 @@
 import os.path
+import shutil
+import tempfile
 
 import unittest
+import xml.etree.ElementTree as ElementTree
 import numpy as np
 import numpy.testing as nptest
 
-from cyphy2cad_postprocess.reader import CyPhy2CADReader
+from cyphy2cad_postprocess.reader import CyPhy2CADReader, CyPhy2CADData
+from cyphy2cad_postprocess.synthetic import write_synthetic_assembly
 
 
 class TestCyPhy2CADReader(unittest.TestCase):
@@ -43,6 +47,188 @@ class TestCyPhy2CADReader(unittest.TestCase):
         cad_data = cad_reader.parse(cad_output_dir)
         self._check_cad_data(cad_data.data)
 
+    def test_child_metrics(self):
+        cad_output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)))
+        components = CyPhy2CADReader(cyphy2cad_output_dir=cad_output_dir, parse=True).cad_data.components
+        tube = components["28c38de6-a26e-4c44-926d-a63173498dac041ce927-77c2-4099-b0bc-7ac113d3a0f3"]
+        nptest.assert_allclose(tube["rotation"], np.array([[0.0, 0.0, -1.0], [-1.0, 0.0, 0.0], [0.0, 1.0, 0.0]]),
+                               atol=1e-12)
+        nptest.assert_allclose(tube["translation"], np.array([149.2, -170.0, -163.6]), rtol=1e-06)
+        nptest.assert_allclose(tube["inertia"]["inertia_tensor_at_center_of_gravity"],
+                               np.diag([341115.5490331022, 8481.10702968749, 341115.5579965851]))
+        nptest.assert_allclose(tube["bounding_box"]["outline_points"],
+                               np.array([[-15.76728783913023, 0.0, -15.8115], [15.76728783913023, 175.0, 15.8115]]))
+        self.assertEqual(tube["mass"], 6.0)
+        self.assertEqual(tube["metric_id"], "2")
+
+        # components sharing a MetricID share metrics but keep their own pose
+        hebi_a = components["76cddc75-c978-44ff-b83b-d3825ad83564"]
+        hebi_b = components["5c964f2c-cd43-458b-90c2-b27754253920"]
+        self.assertEqual(hebi_a["metric_id"], hebi_b["metric_id"])
+        nptest.assert_array_equal(hebi_a["center_of_gravity"], hebi_b["center_of_gravity"])
+        self.assertFalse(np.array_equal(hebi_a["translation"], hebi_b["translation"]))
+
+    def test_keep_xml(self):
+        cad_output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)))
+        cad_data = CyPhy2CADReader(cyphy2cad_output_dir=cad_output_dir, parse=True).cad_data
+        self.assertEqual(cad_data.cadassembly, None)
+        self.assertEqual(cad_data.cadassembly_metrics, None)
+        self.assertEqual(cad_data.computed_values, None)
+
+        cad_data = CyPhy2CADReader(cyphy2cad_output_dir=cad_output_dir, parse=True, keep_xml=True).cad_data
+        self.assertEqual(cad_data.cadassembly.tag, "Assemblies")
+        self.assertEqual(cad_data.cadassembly_metrics.tag, "CADMetricRoot")
+        self.assertEqual(cad_data.computed_values.tag, "Components")
+
+    def test_iter_components(self):
+        cad_output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)))
+        cad_reader = CyPhy2CADReader(cyphy2cad_output_dir=cad_output_dir)
+        records = dict(cad_reader.iter_components())
+        self.assertEqual(cad_reader.cad_data, None)
+        self._check_cad_data({"components": records})
+
+        components = cad_reader.parse().components
+        self.assertItemsEqual(records.keys(), components.keys())
+        for comp, component_data in records.items():
+            self.assertItemsEqual(component_data.keys(), components[comp].keys())
+            nptest.assert_array_equal(component_data.get("translation"), components[comp].get("translation"))
+            if "points" in component_data:
+                self.assertItemsEqual(component_data["points"].keys(), components[comp]["points"].keys())
+
+    def test_refresh(self):
+        test_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)))
+        cad_output_dir = tempfile.mkdtemp()
+        try:
+            for filename in ("CADAssembly.xml", "CADAssembly_metrics.xml", "ComputedValues.xml"):
+                shutil.copy(os.path.join(test_dir, filename), cad_output_dir)
+            cad_reader = CyPhy2CADReader(cyphy2cad_output_dir=cad_output_dir, parse=True)
+            components = cad_reader.cad_data.components
+            top_asm = components["{272a6594-975d-4c4f-8cbe-b4f6e4d2b8f0}|1"]
+            self.assertEqual(cad_reader.refresh(), [])
+
+            # re-run of the metrics step only: the top assembly gets heavier
+            metrics_xml = os.path.join(cad_output_dir, "CADAssembly_metrics.xml")
+            with open(metrics_xml) as f_in:
+                metrics = f_in.read()
+            with open(metrics_xml, 'w') as f_out:
+                f_out.write(metrics.replace('Value="20.786552812349075"', 'Value="21.5"'))
+            stat = os.stat(metrics_xml)
+            os.utime(metrics_xml, (stat.st_atime, stat.st_mtime + 10))
+
+            def fail(path, cad_data):
+                self.fail("re-parsed an unchanged file")
+            cad_reader._parse_cadassembly_xml = cad_reader._parse_computed_values_xml = fail
+
+            self.assertEqual(cad_reader.refresh(), ["CADAssembly_metrics.xml"])
+            self.assertIs(cad_reader.cad_data.components, components)
+            self.assertIs(components["{272a6594-975d-4c4f-8cbe-b4f6e4d2b8f0}|1"], top_asm)
+            self.assertEqual(top_asm["mass"], 21.5)
+            self.assertEqual(top_asm["component_name"], "TestModel_1")
+            self.assertEqual(cad_reader.cad_data.table.mass[cad_reader.cad_data.table.index[
+                "{272a6594-975d-4c4f-8cbe-b4f6e4d2b8f0}|1"]], 21.5)
+            self.assertEqual(cad_reader.refresh(), [])
+        finally:
+            shutil.rmtree(cad_output_dir)
+
+    def test_lazy(self):
+        cad_output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)))
+        cad_reader = CyPhy2CADReader(cyphy2cad_output_dir=cad_output_dir, parse=True, lazy=True)
+        parsed = []
+        for name in ("_parse_cadassembly_xml", "_parse_cadassembly_metrics_xml", "_parse_computed_values_xml"):
+            def parse_stage(path, cad_data, parse_stage=getattr(cad_reader, name)):
+                parsed.append(parse_stage.__name__)
+                return parse_stage(path, cad_data)
+            setattr(cad_reader, name, parse_stage)
+
+        components = cad_reader.cad_data.components
+        points = components["28c38de6-a26e-4c44-926d-a63173498dace8ed074f-44f8-4354-931c-23c060d06b5a"]["points"]
+        self.assertEqual(parsed, ["_parse_computed_values_xml"])
+        self.assertIn("LINKPOINT1", points)
+        top_asm = components["{272a6594-975d-4c4f-8cbe-b4f6e4d2b8f0}|1"]
+        self.assertEqual(top_asm.get("cad_type"), "ASSEMBLY")
+        self.assertEqual(parsed, ["_parse_computed_values_xml", "_parse_cadassembly_xml"])
+        with self.assertRaises(KeyError):
+            top_asm["no_such_field"]
+
+        # listing the components parses the rest
+        self._check_cad_data(cad_reader.cad_data.data)
+        self.assertEqual(parsed, ["_parse_computed_values_xml", "_parse_cadassembly_xml",
+                                  "_parse_cadassembly_metrics_xml"])
+        eager_data = CyPhy2CADReader(cyphy2cad_output_dir=cad_output_dir, parse=True).cad_data
+        self.assertEqual(cad_reader.cad_data.dump(), eager_data.dump())
+
+    def test_lazy_two_dirs(self):
+        # data parsed earlier still loads from its own directory after the reader moved on
+        out_dir = tempfile.mkdtemp()
+        try:
+            dir_a, dir_b = os.path.join(out_dir, "a"), os.path.join(out_dir, "b")
+            write_synthetic_assembly(dir_a, 5)
+            write_synthetic_assembly(dir_b, 8)
+            cad_reader = CyPhy2CADReader(lazy=True)
+            data_a = cad_reader.parse(dir_a)
+            data_b = cad_reader.parse(dir_b)
+            self.assertEqual(len(data_a.components), 5)
+            self.assertEqual(len(data_b.components), 8)
+            self.assertEqual(data_a.dump(), CyPhy2CADReader(dir_a, parse=True).cad_data.dump())
+            self.assertEqual(data_b.dump(), CyPhy2CADReader(dir_b, parse=True).cad_data.dump())
+        finally:
+            shutil.rmtree(out_dir)
+
+    def test_instrument(self):
+        cad_output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)))
+        hooked = []
+        cad_reader = CyPhy2CADReader(cyphy2cad_output_dir=cad_output_dir, stats_hook=hooked.append)
+        cad_data = cad_reader.parse()
+        json_str = cad_data.dump()
+        self.assertEqual([stage.name for stage in cad_reader.stats],
+                         ["CADAssembly_interference.txt", "CADAssembly.xml", "CADAssembly_metrics.xml",
+                          "ComputedValues.xml", "dump"])
+        # the metrics are joined on first access
+        self.assertEqual(len(cad_data.metrics), 60)
+        self.assertEqual(cad_reader.stats.stages[-1].name, "RequestedMetrics.xml")
+        self.assertEqual(hooked, cad_reader.stats.stages)
+
+        metrics_stage = cad_reader.stats["CADAssembly_metrics.xml"]
+        self.assertEqual(metrics_stage.bytes_read, os.path.getsize(os.path.join(cad_output_dir,
+                                                                                "CADAssembly_metrics.xml")))
+        metrics_xml = ElementTree.parse(os.path.join(cad_output_dir, "CADAssembly_metrics.xml"))
+        self.assertEqual(metrics_stage.elements, sum(1 for _ in metrics_xml.iter()))
+        self.assertLessEqual(metrics_stage.xml_seconds, metrics_stage.seconds)
+        self.assertEqual(cad_reader.stats["dump"].bytes_written, len(json_str))
+        self.assertEqual(cad_reader.stats["dump"].elements, 15)
+
+        # parsing again starts over; a reader that is not instrumented has no stats
+        cad_reader.parse()
+        self.assertNotIn("dump", cad_reader.stats)
+        self.assertIsNone(CyPhy2CADReader(cyphy2cad_output_dir=cad_output_dir, parse=True).stats)
+
+        # only the metric files that are read are measured
+        out_dir = tempfile.mkdtemp()
+        try:
+            for filename in ("CADAssembly.xml", "CADAssembly_metrics.xml", "ComputedValues.xml"):
+                shutil.copy(os.path.join(cad_output_dir, filename), out_dir)
+            cad_reader = CyPhy2CADReader(cyphy2cad_output_dir=out_dir, instrument=True)
+            cad_reader.parse().metrics
+        finally:
+            shutil.rmtree(out_dir)
+        self.assertEqual([stage.name for stage in cad_reader.stats],
+                         ["CADAssembly.xml", "CADAssembly_metrics.xml", "ComputedValues.xml"])
+
+    def test_load(self):
+        cad_output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)))
+        cad_data = CyPhy2CADReader(cyphy2cad_output_dir=cad_output_dir, parse=True).cad_data
+        out_dir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(out_dir, "cad_data.json")
+            cad_data.write(filename)
+            loaded = CyPhy2CADData.load(filename)
+        finally:
+            shutil.rmtree(out_dir)
+        self._check_cad_data(loaded.data)
+        self.assertEqual(loaded.dump(), cad_data.dump())
+        self.assertEqual(CyPhy2CADData.loads(cad_data.dump()).dump(), cad_data.dump())
+        nptest.assert_array_equal(loaded.table.inertia, cad_data.table.inertia)
+
     def _check_cad_data(self, data):
 
         def check_dict_kev_value(d, key, expected_val):
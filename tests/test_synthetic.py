@@ -0,0 +1,66 @@
+import shutil
+import tempfile
+
+import unittest
+import numpy as np
+import numpy.testing as nptest
+
+from cyphy2cad_postprocess.reader import CyPhy2CADReader
+from cyphy2cad_postprocess.mass_properties import check_mass_properties
+from cyphy2cad_postprocess.synthetic import write_synthetic_assembly
+
+
+class TestSyntheticAssembly(unittest.TestCase):
+
+    def setUp(self):
+        self.out_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.out_dir)
+
+    def test_parses_consistently(self):
+        assembly = write_synthetic_assembly(self.out_dir, 50, link_points=3)
+        cad_data = CyPhy2CADReader(cyphy2cad_output_dir=self.out_dir, parse=True).cad_data
+        self.assertEqual(sorted(cad_data.components.keys()), sorted(assembly.component_ids))
+        top_asm = cad_data.components[assembly.component_ids[0]]
+        self.assertEqual(top_asm["cad_type"], "ASSEMBLY")
+        self.assertIsNone(top_asm["rotation"])
+
+        # the reported top assembly is the roll-up of its parts
+        check = check_mass_properties(cad_data, rtol=1e-9)
+        self.assertTrue(check.passed[0])
+
+        # link points are reported in the top-assembly frame
+        comp = assembly.component_ids[7]
+        self.assertEqual(sorted(cad_data.components[comp]["points"]), ["LINKPOINT1", "LINKPOINT2", "LINKPOINT3"])
+        nptest.assert_allclose(cad_data.components[comp]["points"]["LINKPOINT1"], assembly.link_points[7, 0])
+        self.assertEqual(cad_data.constraint_graph.neighbors(comp),
+                         set(assembly.component_ids[row] for row in (5, 6, 8, 9)))
+
+    def test_depth_and_part_types(self):
+        assembly = write_synthetic_assembly(self.out_dir, 200, depth=3, part_types=5)
+        self.assertEqual(assembly.level.max(), 3)
+        self.assertEqual(len(assembly), 200)
+        cad_data = CyPhy2CADReader(cyphy2cad_output_dir=self.out_dir, parse=True).cad_data
+        part_metrics = set(component["metric_id"] for component in cad_data.components.values()
+                           if component["cad_type"] == "PART")
+        self.assertLessEqual(len(part_metrics), 5)
+
+        # every sub-assembly holds the mass of its children
+        for row in np.flatnonzero(assembly.cad_type == "ASSEMBLY"):
+            children = assembly.metric_rows[assembly.children(row)]
+            self.assertAlmostEqual(assembly.mass[assembly.metric_rows[row]], assembly.mass[children].sum())
+
+        # the roll-up of the top assembly's children matches its MetricID 1 mass properties
+        check = check_mass_properties(cad_data, rtol=1e-9)
+        self.assertTrue(check.passed[0])
+        top_metric = assembly.metric_rows[0]
+        self.assertEqual(assembly.metric_ids[top_metric], "1")
+        self.assertAlmostEqual(check.mass[0], assembly.mass[top_metric])
+        nptest.assert_allclose(check.center_of_gravity[0], assembly.center_of_gravity[top_metric], atol=1e-9)
+        nptest.assert_allclose(check.inertia[0], assembly.inertia[top_metric], rtol=1e-9, atol=1e-6)
+        self.assertAlmostEqual(cad_data.table.total_mass(), assembly.mass[top_metric])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import os.path
+
+import unittest
+import numpy as np
+import numpy.testing as nptest
+
+from cyphy2cad_postprocess.reader import CyPhy2CADReader, CyPhy2CADData
+from cyphy2cad_postprocess.mass_properties import check_mass_properties
+from cyphy2cad_postprocess.units import SI_UNITS, conversion_factor
+
+
+class TestUnits(unittest.TestCase):
+
+    def setUp(self):
+        self.cad_output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)))
+        self.raw = CyPhy2CADReader(cyphy2cad_output_dir=self.cad_output_dir, parse=True).cad_data
+        self.top_asm_id = "{272a6594-975d-4c4f-8cbe-b4f6e4d2b8f0}|1"
+        self.chassis_id = "0293b7a1-af8e-4522-8707-6fbf786585db"
+        # two components sharing MetricID 8, so sharing their metric arrays
+        self.hebi_ids = ["76cddc75-c978-44ff-b83b-d3825ad83564", "5c964f2c-cd43-458b-90c2-b27754253920"]
+
+    def test_conversion_factor(self):
+        self.assertAlmostEqual(conversion_factor('distance', 'inch', 'millimeter'), 25.4)
+        self.assertAlmostEqual(conversion_factor('mass', 'Kilogram', 'gram'), 1000.0)
+        self.assertEqual(conversion_factor('distance', None, 'meter'), 1.0)
+        with self.assertRaises(ValueError):
+            conversion_factor('distance', 'furlong', 'meter')
+
+    def test_iter_components_in_si_units(self):
+        cad_reader = CyPhy2CADReader(cyphy2cad_output_dir=self.cad_output_dir, units=SI_UNITS)
+        streamed = CyPhy2CADData()
+        streamed.components.update(cad_reader.iter_components())
+        self.assertEqual(streamed.components[self.chassis_id]["units"]["distance"], "meter")
+        self.assertEqual(streamed.dump(), cad_reader.parse().dump())
+
+    def test_parse_in_si_units(self):
+        si = CyPhy2CADReader(cyphy2cad_output_dir=self.cad_output_dir, parse=True, units=SI_UNITS).cad_data
+        for comp in [self.top_asm_id, self.chassis_id] + self.hebi_ids:
+            raw_data, si_data = self.raw.components[comp], si.components[comp]
+            self.assertEqual(si_data["units"]["distance"], "meter")
+            self.assertEqual(si_data["units"]["force"], raw_data["units"]["force"])
+            self.assertEqual(si_data["mass"], raw_data["mass"])
+            self.assertAlmostEqual(si_data["volume"], raw_data["volume"] * 1e-9)
+            self.assertAlmostEqual(si_data["surface_area"], raw_data["surface_area"] * 1e-6)
+            nptest.assert_allclose(si_data["center_of_gravity"], raw_data["center_of_gravity"] * 1e-3)
+            nptest.assert_allclose(si_data["bounding_box"]["outline_points"],
+                                   raw_data["bounding_box"]["outline_points"] * 1e-3)
+            nptest.assert_allclose(si_data["inertia"]["inertia_tensor_at_center_of_gravity"],
+                                   raw_data["inertia"]["inertia_tensor_at_center_of_gravity"] * 1e-6)
+            nptest.assert_array_equal(si_data["rotation"], raw_data["rotation"])
+        nptest.assert_allclose(si.components[self.chassis_id]["translation"],
+                               self.raw.components[self.chassis_id]["translation"] * 1e-3)
+        nptest.assert_allclose(si.components[self.chassis_id]["points"]["LINKPOINT1"],
+                               self.raw.components[self.chassis_id]["points"]["LINKPOINT1"] * 1e-3)
+
+        # the computed metrics keep the units they were reported in
+        metric_id = self.chassis_id + ":LINKPOINT1"
+        self.assertEqual(si.metrics[metric_id]["units"], "millimeter")
+        nptest.assert_array_equal(si.metrics[metric_id]["value"], self.raw.metrics[metric_id]["value"])
+        self.assertTrue(check_mass_properties(si).passed[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import os.path
+
+import unittest
+import numpy as np
+import numpy.testing as nptest
+
+from cyphy2cad_postprocess.reader import CyPhy2CADReader
+from cyphy2cad_postprocess.world_frame import compose_poses, transform_points
+
+
+class TestWorldFrame(unittest.TestCase):
+
+    def setUp(self):
+        cad_output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)))
+        self.cad_data = CyPhy2CADReader(cyphy2cad_output_dir=cad_output_dir, parse=True).cad_data
+        self.top_asm_id = "{272a6594-975d-4c4f-8cbe-b4f6e4d2b8f0}|1"
+
+    def test_matches_per_component_transform(self):
+        world_frame = self.cad_data.world_frame
+        self.assertIs(self.cad_data.world_frame, world_frame)
+        self.assertEqual(world_frame.bounds.shape, (15, 2, 3))
+        for comp, component_data in self.cad_data.components.items():
+            row = world_frame.index[comp]
+            rotation = component_data["rotation"]
+            translation = component_data["translation"]
+            if rotation is None:
+                rotation, translation = np.eye(3), np.zeros(3)
+            nptest.assert_allclose(world_frame.center_of_gravity[row],
+                                   rotation.dot(component_data["center_of_gravity"]) + translation)
+            outline_points = component_data["bounding_box"]["outline_points"]
+            nptest.assert_allclose(world_frame.outline_points[row], outline_points.dot(rotation.T) + translation)
+            corners = np.array([[x, y, z] for x in outline_points[:, 0]
+                                for y in outline_points[:, 1] for z in outline_points[:, 2]])
+            corners = corners.dot(rotation.T) + translation
+            nptest.assert_allclose(world_frame.bounds[row], [corners.min(axis=0), corners.max(axis=0)],
+                                   atol=1e-9)
+
+        # the top assembly is the world frame
+        row = world_frame.index[self.top_asm_id]
+        nptest.assert_array_equal(world_frame.rotation[row], np.eye(3))
+        nptest.assert_array_equal(world_frame.center_of_gravity[row],
+                                  self.cad_data.components[self.top_asm_id]["center_of_gravity"])
+
+    def test_link_points(self):
+        world_frame = self.cad_data.world_frame
+        self.assertEqual(len(world_frame.link_points), world_frame.link_point_offsets[-1])
+        for comp, component_data in self.cad_data.components.items():
+            points = world_frame.points(comp)
+            self.assertItemsEqual(points.keys(), component_data.get("points", {}).keys())
+            for name, point in points.items():
+                nptest.assert_array_equal(point, component_data["points"][name])
+            # link points are reported in the top-assembly frame: they lie on the posed components
+            lower, upper = world_frame.bounds[world_frame.index[comp]]
+            if points and comp != self.top_asm_id:
+                inside = [np.all((point >= lower - 1e-6) & (point <= upper + 1e-6)) for point in points.values()]
+                self.assertTrue(any(inside))
+
+    def test_compose_poses(self):
+        quarter_turn = np.array([[0.0, -1.0, 0.0], [1.0, 0.0, 0.0], [0.0, 0.0, 1.0]])
+        rotation = np.array([np.full((3, 3), np.nan), quarter_turn, quarter_turn])
+        translation = np.array([[np.nan] * 3, [1.0, 0.0, 0.0], [1.0, 0.0, 0.0]])
+        world_rotation, world_translation = compose_poses(rotation, translation, [-1, 0, 1])
+        nptest.assert_allclose(world_rotation[2], quarter_turn.dot(quarter_turn))
+        nptest.assert_allclose(world_translation, [[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [1.0, 1.0, 0.0]])
+        nptest.assert_allclose(transform_points(world_rotation, world_translation, np.ones((3, 3)))[2],
+                               [0.0, 0.0, 1.0])
+        with self.assertRaises(ValueError):
+            compose_poses(rotation, translation, [-1, 2, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()